@@ -1,15 +1,7 @@
 import streamlit as st
+from mysql.connector import Error
 from auth.auth import AuthManager
-from interface.dashboard import Dashboard
-from interface.campaigns import CampaignManager
-from interface.analytics import Analytics
-from interface.products import ProductManager
-from interface.roi import ROIAnalysis
-from interface.sales_profit import SalesProfitAnalysis
-from database.db import DatabaseManager
-import extra_streamlit_components as stx
-from config import DB_HOST, DB_USER, DB_PASSWORD, DB_NAME
-from testes_sales import SalesManager
+from interface.registry import PAGES, init_database, get_db_operations, render_page
 
 
 # Configuração inicial da página
@@ -19,12 +11,18 @@ st.set_page_config(
     layout="wide"
 )
 
-# Inicializa o gerenciador de autenticação
-auth = AuthManager()
+# Banco de dados: migrações e DBOperations criados uma vez por processo
+try:
+    applied_migrations = init_database()
+except Error as e:
+    st.error(f"Erro ao inicializar banco de dados: {e}")
+    st.stop()
+if applied_migrations:
+    st.success(f"Banco de dados atualizado para a versão {applied_migrations[-1]}!")
+    applied_migrations.clear()  # o aviso aparece uma vez só
 
-# Verifica se o banco de dados está inicializado
-db_manager = DatabaseManager()
-db_manager.initialize_database()
+# Inicializa o gerenciador de autenticação (o CookieManager é por sessão)
+auth = AuthManager(get_db_operations())
 
 # Página de login/cadastro
 if not auth.is_authenticated():
@@ -63,34 +61,9 @@ else:
     if st.sidebar.button("Logout"):
         auth.logout_user()
     
-    menu_options = {
-        "Dashboard": Dashboard(),
-        "Produtos": ProductManager(),
-        "Campanhas": CampaignManager(),
-        "Vendas e Lucros": SalesProfitAnalysis(),
-        "Análise de ROI": ROIAnalysis(),
-        "Análises": Analytics()
-    }
-    
     selected_page = st.sidebar.radio(
         "Menu",
-        list(menu_options.keys()))
-    
-    # Exibe a página selecionada
-    page = menu_options[selected_page]
-    user_id = auth.get_current_user_id()
+        list(PAGES.keys()))
     
-    if selected_page == "Dashboard":
-        page.show_dashboard(user_id)
-    elif selected_page == "Produtos":
-        page.show_product_form(user_id)
-        page.show_product_list(user_id)
-    elif selected_page == "Campanhas":
-        page.show_campaign_form(user_id)
-        page.show_campaign_list(user_id)
-    elif selected_page == "Vendas e Lucros":
-        page.show_sales_profit_analysis(user_id)
-    elif selected_page == "Análise de ROI":
-        page.show_roi_analysis(user_id)
-    elif selected_page == "Análises":
-        page.show_sales_analytics(user_id)
\ No newline at end of file
+    # Exibe a página selecionada (só ela é construída)
+    render_page(selected_page, auth.get_current_user_id())
\ No newline at end of file
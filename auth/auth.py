@@ -6,9 +6,9 @@ import extra_streamlit_components as stx
 from datetime import datetime, timedelta
 
 class AuthManager:
-    def __init__(self):
+    def __init__(self, db_ops=None):
         """Gerenciador de autenticação de usuários"""
-        self.db_ops = DBOperations()
+        self.db_ops = db_ops or DBOperations()
         self.current_user = None
         self.cookie_manager = stx.CookieManager()
     
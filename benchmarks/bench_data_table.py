@@ -0,0 +1,110 @@
+"""Benchmark: tabela de vendas formatada como texto x numérica com column_config
+
+Mede, para N linhas, o custo de preparar o DataFrame e serializá-lo em Arrow
+(o que o st.dataframe envia ao navegador):
+  - texto: três colunas monetárias e a margem formatadas com .apply por célula
+    e reordenadas em pandas (como a tabela fazia antes)
+  - numérico: colunas float64 e formatação pelo column_config (data_table)
+  - página: uma página de 50 linhas vinda da consulta (paged_table)
+
+Uso:
+    python -m benchmarks.bench_data_table [--rows 500000]
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+from streamlit.dataframe_util import convert_pandas_df_to_arrow_bytes
+
+from interface.components.data_table import numeric_frame
+from interface.sales_profit import SalesProfitAnalysis
+
+COLUMNS = SalesProfitAnalysis.SALES_TABLE_COLUMNS
+
+
+def sales_frame(rows):
+    rng = np.random.default_rng(42)
+    amount = rng.integers(990, 99990, rows) / 100
+    quantity = rng.integers(1, 5, rows)
+    cost = amount * rng.uniform(0.1, 0.6, rows)
+    frame = pd.DataFrame({
+        'product_name': pd.Categorical(rng.choice([f"Produto {i}" for i in range(50)], rows)),
+        'sale_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 900, rows), unit='D'),
+        'platform': pd.Categorical(rng.choice(['Hotmart', 'Eduzz', 'Kiwify', 'Monetizze'], rows)),
+        'quantity': quantity,
+        'amount': amount,
+    })
+    frame['total_sale'] = frame['amount'] * frame['quantity']
+    frame['profit'] = frame['total_sale'] - cost * quantity
+    return frame.sort_values('sale_date', ascending=False, ignore_index=True)
+
+
+def page_rows(size):
+    """Linhas como o cursor dictionary=True devolve (DECIMAL -> Decimal)"""
+    rows = []
+    for i in range(size):
+        amount = Decimal(random.randint(990, 99990)) / 100
+        quantity = random.randint(1, 4)
+        rows.append({
+            'id': i, 'product_name': f"Produto {i % 50}", 'sale_date': date(2024, 1, 1) + timedelta(days=i),
+            'platform': 'Hotmart', 'quantity': quantity, 'amount': amount,
+            'total_sale': amount * quantity, 'profit': amount * quantity / 2, 'cost': amount / 2,
+        })
+    return rows
+
+
+def as_text(df):
+    """Caminho anterior: cópia, formatação célula a célula e nova ordenação"""
+    display_df = df[list(COLUMNS)[:-1]].copy()
+    display_df['profit_margin'] = (display_df['profit'] / display_df['total_sale'] * 100).round(2)
+    display_df.columns = [label for label, _ in COLUMNS.values()]
+    for column in ('Preço Unitário', 'Total Venda', 'Lucro'):
+        display_df[column] = display_df[column].apply(lambda x: f"R$ {x:,.2f}")
+    display_df['Margem (%)'] = display_df['Margem (%)'].apply(lambda x: f"{x:.2f}%")
+    return display_df.sort_values('Data Venda', ascending=False)
+
+
+def as_numeric(df):
+    frame = numeric_frame(df, COLUMNS)
+    frame = frame.assign(profit_margin=(frame['profit'] / frame['total_sale'] * 100).round(2))
+    return frame[list(COLUMNS)]
+
+
+def timed(function, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500_000)
+    parser.add_argument('--page-size', type=int, default=SalesProfitAnalysis.PAGE_SIZE)
+    args = parser.parse_args(argv)
+
+    df = sales_frame(args.rows)
+    rows = page_rows(args.page_size)
+
+    cases = [
+        ("texto (.apply)", lambda: as_text(df)),
+        ("numérico", lambda: as_numeric(df)),
+        (f"página de {args.page_size}", lambda: as_numeric(pd.DataFrame.from_records(rows))),
+    ]
+    print(f"{args.rows:,} linhas\n")
+    print(f"{'caminho':<18}{'preparo (s)':>13}{'Arrow (s)':>11}{'total (s)':>11}{'payload (MiB)':>15}")
+    for label, prepare in cases:
+        prepare_time, frame = timed(prepare)
+        arrow_time, payload = timed(convert_pandas_df_to_arrow_bytes, frame)
+        print(f"{label:<18}{prepare_time:>13.3f}{arrow_time:>11.3f}{prepare_time + arrow_time:>11.3f}"
+              f"{len(payload) / 2**20:>15.1f}")
+
+
+if __name__ == '__main__':
+    main()
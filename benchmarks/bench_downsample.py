@@ -0,0 +1,56 @@
+"""Benchmark: série longa inteira x reduzida (LTTB e mín/máx) no gráfico de linha
+
+Para N pontos, mede o tempo de redução, o tamanho do JSON da figura Plotly
+(o que o st.plotly_chart envia ao navegador) e se o maior pico e o menor
+vale da série continuam no gráfico.
+
+Uso:
+    python -m benchmarks.bench_downsample [--points 1000000] [--max-points 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from interface.components.charts import downsample
+
+
+def series(points):
+    rng = np.random.default_rng(7)
+    trend = np.sin(np.arange(points) / (points / 20)) * 100 + 500
+    values = trend + rng.normal(0, 15, points)
+    values[rng.integers(0, points, 20)] *= 3  # picos isolados
+    return pd.DataFrame({
+        'sale_date': pd.date_range('2000-01-01', periods=points, freq='h'),
+        'revenue': values,
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=1_000_000)
+    parser.add_argument('--max-points', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    df = series(args.points)
+    peak, trough = df['revenue'].idxmax(), df['revenue'].idxmin()
+    print(f"{args.points:,} pontos, limite de {args.max_points:,}\n")
+    print(f"{'método':<10}{'pontos':>10}{'redução (s)':>13}{'figura (s)':>12}{'JSON (MiB)':>12}{'pico/vale':>11}")
+    for method in (None, 'lttb', 'minmax'):
+        started = time.perf_counter()
+        sample = df if method is None else downsample(df, 'sale_date', 'revenue', args.max_points, method)
+        reduce_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        payload = px.line(sample, x='sale_date', y='revenue').to_json()
+        figure_time = time.perf_counter() - started
+
+        kept = 'sim' if {peak, trough} <= set(sample.index) else 'não'
+        print(f"{method or 'nenhum':<10}{len(sample):>10,}{reduce_time:>13.3f}{figure_time:>12.3f}"
+              f"{len(payload) / 2**20:>12.2f}{kept:>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: DataFrame a partir de dicts com Decimal x fetch_frame tipado
+
+Simula o resultado de um SELECT de vendas (sem banco) e compara:
+  - caminho antigo: cursor dictionary=True -> pd.DataFrame(lista_de_dicts)
+  - caminho novo:   tuplas -> database.frames.build_frame (colunas tipadas)
+
+Uso:
+    python -m benchmarks.bench_fetch_frame [--rows 1000000]
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pandas as pd
+
+from database.frames import build_frame, SALES_DTYPES
+
+COLUMNS = ('id', 'product_name', 'amount', 'quantity', 'cost', 'sale_date', 'platform')
+PLATFORMS = ['Hotmart', 'Eduzz', 'Kiwify', 'Monetizze', 'Kirvano']
+PRODUCTS = [f"Produto {i}" for i in range(50)]
+
+
+def make_rows(n):
+    random.seed(42)
+    start = date(2020, 1, 1)
+    return [
+        (
+            i,
+            random.choice(PRODUCTS),
+            Decimal(random.randint(990, 99990)) / 100,
+            random.randint(1, 3),
+            Decimal(random.randint(0, 5000)) / 100,
+            start + timedelta(days=random.randint(0, 1800)),
+            random.choice(PLATFORMS),
+        )
+        for i in range(n)
+    ]
+
+
+def measure(label, build):
+    # Tempo sem tracemalloc (que distorce as medições) e memória numa segunda rodada
+    gc.collect()
+    started = time.perf_counter()
+    df = build()
+    built = time.perf_counter()
+    total = (df['amount'] * df['quantity']).sum()
+    by_product = df.groupby('product_name', observed=True)['amount'].sum()
+    finished = time.perf_counter()
+    frame_memory = df.memory_usage(deep=True).sum()
+    dtypes = dict(df.dtypes.astype(str))
+    del df
+
+    gc.collect()
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{label}")
+    print(f"  montagem do DataFrame: {built - started:8.3f} s")
+    print(f"  soma + groupby:        {finished - built:8.3f} s")
+    print(f"  pico de memória:       {peak / 2**20:8.1f} MiB")
+    print(f"  memória do DataFrame:  {frame_memory / 2**20:8.1f} MiB")
+    print(f"  dtypes: {dtypes}")
+    return float(total), len(by_product)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    rows = make_rows(args.rows)
+    print(f"{args.rows:,} linhas sintéticas\n")
+
+    def from_dicts():
+        dict_rows = [dict(zip(COLUMNS, row)) for row in rows]
+        return pd.DataFrame(dict_rows)
+
+    old = measure("Antigo: lista de dicts + Decimal (object)", from_dicts)
+    new = measure("Novo: build_frame com colunas tipadas", lambda: build_frame(rows, COLUMNS, SALES_DTYPES))
+    assert abs(old[0] - new[0]) < 0.01 * max(1.0, abs(old[0])) and old[1] == new[1]
+
+
+if __name__ == '__main__':
+    main()
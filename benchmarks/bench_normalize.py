@@ -0,0 +1,145 @@
+"""Benchmark: normalização registro a registro x normalize_sales vetorizado
+
+Gera páginas sintéticas no formato de cada plataforma e compara:
+  - laço Python: um dict por registro, datas e status convertidos um a um
+  - normalize_sales: só os campos de SALE_FIELDS extraídos por nível com
+    DataFrame.from_records, e conversões vetorizadas do pandas
+
+Uso:
+    python -m benchmarks.bench_normalize [--records 100000]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from integrations import EduzzIntegration, HotmartIntegration, KiwifyIntegration, MonetizzeIntegration
+from integrations.normalize import SALES_TIMEZONE
+
+PRODUCTS = [f"Produto {i}" for i in range(50)]
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _moment(i):
+    return START + timedelta(minutes=i * 7 % 800_000)
+
+
+def hotmart_record(i):
+    return {
+        'product': {'id': i % 50, 'name': PRODUCTS[i % 50]},
+        'purchase': {
+            'transaction': f"HP{i:010d}",
+            'status': random.choice(['APPROVED', 'COMPLETE', 'REFUNDED', 'CHARGEBACK']),
+            'approved_date': int(_moment(i).timestamp() * 1000),
+            'price': {'value': random.randint(990, 99990) / 100, 'currency_code': 'BRL'},
+        },
+        'buyer': {'name': 'Comprador', 'email': f"c{i}@exemplo.com"},
+    }
+
+
+def eduzz_record(i):
+    return {
+        'sale_id': 10_000_000 + i,
+        'content_title': PRODUCTS[i % 50],
+        'sale_amount_win': f"{random.randint(990, 99990) / 100:.2f}",
+        'date_payment': _moment(i).astimezone(ZoneInfo(SALES_TIMEZONE)).strftime('%Y-%m-%d %H:%M:%S'),
+        'sale_status_name': random.choice(['Paga', 'Cancelada', 'Reembolsado']),
+    }
+
+
+def kiwify_record(i):
+    return {
+        'id': f"kw-{i}",
+        'order_status': random.choice(['paid', 'refunded', 'chargedback']),
+        'net_amount': random.randint(990, 99990),
+        'approved_date': _moment(i).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'product': {'id': i % 50, 'name': PRODUCTS[i % 50]},
+    }
+
+
+def monetizze_record(i):
+    return {
+        'produto': {'codigo': i % 50, 'nome': PRODUCTS[i % 50]},
+        'venda': {
+            'codigo': 500_000 + i,
+            'status': random.choice(['Finalizada', 'Completa', 'Cancelada', 'Devolvida']),
+            'dataFinalizada': _moment(i).astimezone(ZoneInfo(SALES_TIMEZONE)).strftime('%Y-%m-%d %H:%M:%S'),
+            'valor': f"{random.randint(990, 99990) / 100:.2f}",
+        },
+    }
+
+
+def _get(record, path):
+    for key in path.split('.'):
+        if not isinstance(record, dict):
+            return None
+        record = record.get(key)
+    return record
+
+
+def normalize_loop(integration, records):
+    """Referência: o mesmo mapeamento feito registro a registro"""
+    fields = integration.SALE_FIELDS
+    local = ZoneInfo(integration.SOURCE_TIMEZONE)
+    target = ZoneInfo(SALES_TIMEZONE)
+    rows = []
+    for record in records:
+        paths = fields['sale_date'] if isinstance(fields['sale_date'], list) else [fields['sale_date']]
+        moment = next((value for value in (_get(record, path) for path in paths) if value), None)
+        if isinstance(moment, (int, float)):
+            moment = datetime.fromtimestamp(moment / 1000, timezone.utc)
+        elif moment:
+            moment = datetime.fromisoformat(moment.replace('Z', '+00:00'))
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=local)
+        amount = float(_get(record, fields['amount']))
+        rows.append({
+            'product_name': _get(record, fields['product_name']),
+            'amount_cents': round(amount if integration.AMOUNT_IN_CENTS else amount * 100),
+            'quantity': 1,
+            'sale_date': moment.astimezone(target).date() if moment else None,
+            'platform': integration.PLATFORM_NAME,
+            'external_id': str(_get(record, fields['external_id'])),
+            'status': integration.normalize_status(_get(record, fields['status'])),
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    random.seed(42)
+    cases = [
+        (HotmartIntegration, hotmart_record),
+        (EduzzIntegration, eduzz_record),
+        (KiwifyIntegration, kiwify_record),
+        (MonetizzeIntegration, monetizze_record),
+    ]
+    print(f"{args.records:,} registros sintéticos por plataforma\n")
+    print(f"{'plataforma':<12}{'laço (s)':>10}{'vetorizado (s)':>16}{'ganho':>8}{'registros/s':>14}")
+    for integration, make_record in cases:
+        records = [make_record(i) for i in range(args.records)]
+
+        started = time.perf_counter()
+        rows = normalize_loop(integration, records)
+        loop_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        frame = integration.normalize_sales(records)
+        vector_time = time.perf_counter() - started
+
+        # Os dois caminhos precisam concordar
+        assert len(frame) == len(rows)
+        assert int(frame['amount_cents'].sum()) == sum(row['amount_cents'] for row in rows)
+        assert list(frame['sale_date'].dt.date[:1000]) == [row['sale_date'] for row in rows[:1000]]
+        assert list(frame['status'][:1000]) == [row['status'] for row in rows[:1000]]
+
+        print(f"{integration.PLATFORM_NAME:<12}{loop_time:>10.3f}{vector_time:>16.3f}"
+              f"{loop_time / vector_time:>7.1f}x{args.records / vector_time:>14,.0f}")
+
+
+if __name__ == '__main__':
+    main()
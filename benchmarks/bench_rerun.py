@@ -0,0 +1,95 @@
+"""Benchmark: latência de rerun do app.py com usuário autenticado
+
+Executa o app com streamlit.testing (AppTest), seleciona uma página e repete
+reruns ociosos (sem interação), medindo o tempo de cada um e quantos objetos
+da camada de banco e de páginas foram construídos por rerun.
+
+Precisa do MySQL configurado em database/db.py e das dependências do app.
+Para comparar com uma versão anterior do app.py:
+    git show <commit>:app.py > app_antes.py
+    python -m benchmarks.bench_rerun --app app_antes.py
+    python -m benchmarks.bench_rerun
+
+Uso:
+    python -m benchmarks.bench_rerun [--app app.py] [--page Análises] [--reruns 30] [--user-id 1]
+"""
+import argparse
+import functools
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from database.db import DatabaseManager
+from database.operations import DBOperations
+
+
+def _count_calls(owner, name, counters, key):
+    """Envolve owner.name para contar chamadas (sem alterar o comportamento)"""
+    original = getattr(owner, name)
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        counters[key] = counters.get(key, 0) + 1
+        return original(*args, **kwargs)
+
+    setattr(owner, name, wrapper)
+
+
+def _page_classes():
+    from interface.analytics import Analytics
+    from interface.campaigns import CampaignManager
+    from interface.dashboard import Dashboard
+    from interface.products import ProductManager
+    from interface.roi import ROIAnalysis
+    from interface.sales_profit import SalesProfitAnalysis
+    return [Analytics, CampaignManager, Dashboard, ProductManager, ROIAnalysis, SalesProfitAnalysis]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--app', default='app.py')
+    parser.add_argument('--page', default='Análises', help='página exibida durante os reruns')
+    parser.add_argument('--reruns', type=int, default=30)
+    parser.add_argument('--user-id', type=int, default=1)
+    parser.add_argument('--username', default='benchmark')
+    args = parser.parse_args(argv)
+
+    counters = {}
+    _count_calls(DBOperations, '__init__', counters, 'DBOperations')
+    _count_calls(DatabaseManager, '__init__', counters, 'DatabaseManager')
+    _count_calls(DatabaseManager, 'initialize_database', counters, 'initialize_database')
+    for page_class in _page_classes():
+        _count_calls(page_class, '__init__', counters, 'páginas')
+
+    app = AppTest.from_file(args.app, default_timeout=120)
+    app.session_state['authenticated'] = True
+    app.session_state['user_id'] = args.user_id
+    app.session_state['username'] = args.username
+
+    started = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - started
+    app.sidebar.radio[0].set_value(args.page).run()
+    if app.exception:
+        raise SystemExit(f"O app falhou: {app.exception[0].message}")
+
+    timings = []
+    counters.clear()
+    for _ in range(args.reruns):
+        started = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - started)
+
+    timings.sort()
+    print(f"{args.app}, página '{args.page}', {args.reruns} reruns ociosos\n")
+    print(f"primeira execução: {first_run * 1000:.0f} ms")
+    print(f"rerun: média {statistics.mean(timings) * 1000:.1f} ms, mediana {statistics.median(timings) * 1000:.1f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95) - 1] * 1000:.1f} ms")
+    print("objetos construídos por rerun:")
+    for key in ('DBOperations', 'DatabaseManager', 'initialize_database', 'páginas'):
+        print(f"  {key:<20}{counters.get(key, 0) / args.reruns:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
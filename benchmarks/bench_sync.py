@@ -0,0 +1,125 @@
+"""Benchmark: sincronização ponta a ponta contra as APIs simuladas
+
+Sobe benchmarks.mock_marketplace numa thread e, para cada integração, lê
+todas as páginas com iter_sales + normalize_sales (sem banco), medindo
+registros/s, pico de memória e o comportamento de novas tentativas (429,
+401 e renovações de token). No fim sincroniza as quatro plataformas ao mesmo
+tempo com SyncOrchestrator e, por último, repete test_connection() em
+instâncias novas para medir o cache de catálogo (ETag -> 304) e o reuso de
+conexões entre instâncias.
+
+Uso:
+    python -m benchmarks.bench_sync [--records 20000] [--latency 0.005]
+        [--token-ttl 20] [--throttle-every 25] [--respect-rate-limit]
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+START_DATE, END_DATE = '2024-01-01', '2026-12-31'
+
+
+def sync_platform(integration_class):
+    integration = integration_class(1)
+    pages = rows = 0
+    for items in integration.iter_sales(START_DATE, END_DATE):
+        frame = integration.normalize_sales(items)
+        pages += 1
+        rows += len(frame)
+    return integration, pages, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=20000, help='registros por plataforma')
+    parser.add_argument('--max-page-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.005, help='segundos por requisição no servidor')
+    parser.add_argument('--token-ttl', type=int, default=20, help='requisições por token OAuth (0 = sem expiração)')
+    parser.add_argument('--throttle-every', type=int, default=25, help='um 429 a cada N requisições (0 = nunca)')
+    parser.add_argument('--retry-after', type=float, default=0.05)
+    parser.add_argument('--checks', type=int, default=20, help='test_connection() por plataforma')
+    parser.add_argument('--respect-rate-limit', action='store_true',
+                        help='usa o RATE_LIMIT real de cada plataforma (mede o limitador)')
+    args = parser.parse_args(argv)
+
+    # Renovações de token gravam no store: mantém tudo num diretório temporário
+    workdir = tempfile.mkdtemp(prefix='bench_sync_')
+    os.environ.setdefault('CREDENTIALS_PATH', os.path.join(workdir, 'credentials.json'))
+    os.environ.setdefault('CREDENTIALS_KEY_FILE', os.path.join(workdir, 'credentials.key'))
+    os.environ.setdefault('HTTP_CACHE_DIR', os.path.join(workdir, 'http_cache'))
+
+    from benchmarks.mock_marketplace import MarketplaceState, start_server, mock_integrations
+    from integrations.sync import SyncOrchestrator
+
+    state = MarketplaceState(args.records, args.max_page_size, args.latency, args.token_ttl,
+                             args.throttle_every, args.retry_after)
+    server, base_url = start_server(state)
+    classes = mock_integrations(base_url, None if args.respect_rate_limit else (1e6, 1_000_000))
+
+    print(f"{args.records:,} registros por plataforma, latência {args.latency * 1000:.0f} ms, "
+          f"token por {args.token_ttl or '∞'} req., 429 a cada {args.throttle_every or '∞'} req.\n")
+    print(f"{'plataforma':<12}{'páginas':>8}{'registros':>11}{'tempo (s)':>11}{'registros/s':>13}"
+          f"{'pico (MiB)':>12}{'req.':>6}{'retries':>9}{'429':>5}{'renov.':>8}")
+    try:
+        for platform, integration_class in classes.items():
+            gc.collect()
+            started = time.perf_counter()
+            integration, pages, rows = sync_platform(integration_class)
+            elapsed = time.perf_counter() - started
+            assert rows == args.records, (platform, rows)
+
+            # Memória numa segunda rodada (tracemalloc distorce o tempo)
+            gc.collect()
+            tracemalloc.start()
+            sync_platform(integration_class)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            stats = integration.transport_stats
+            print(f"{platform:<12}{pages:>8}{rows:>11,}{elapsed:>11.2f}{rows / elapsed:>13,.0f}"
+                  f"{peak / 2**20:>12.1f}{stats['requests']:>6}{stats['retries']:>9}"
+                  f"{stats['throttled']:>5}{stats['refreshes']:>8}")
+
+        counted = {}
+
+        def count_rows(user_id, platform, items):
+            frame = classes[platform].normalize_sales(items)
+            counted[platform] = counted.get(platform, 0) + len(frame)
+            return len(frame)
+
+        orchestrator = SyncOrchestrator(
+            page_handler=count_rows,
+            integration_factory=lambda platform, user_id: classes[platform](user_id)
+        )
+        started = time.perf_counter()
+        results = orchestrator.sync_user(1, list(classes), START_DATE, END_DATE)
+        elapsed = time.perf_counter() - started
+        total = sum(result['rows'] for result in results)
+        assert all(result['status'] == 'ok' for result in results), results
+        print(f"\nSyncOrchestrator, 4 plataformas em paralelo: {total:,} registros em {elapsed:.2f}s "
+              f"({total / elapsed:,.0f} registros/s)")
+
+        print(f"\n{args.checks} test_connection() por plataforma, cada um numa instância nova:")
+        print(f"{'plataforma':<12}{'tempo (ms)':>12}{'304':>6}{'bytes recebidos':>17}")
+        connections = state.connections
+        for platform, integration_class in classes.items():
+            before = dict(state.counters[platform])
+            started = time.perf_counter()
+            for _ in range(args.checks):
+                assert integration_class(1).test_connection()
+            elapsed = time.perf_counter() - started
+            after = state.counters[platform]
+            print(f"{platform:<12}{elapsed * 1000 / args.checks:>12.1f}"
+                  f"{after['not_modified'] - before['not_modified']:>6}{after['bytes'] - before['bytes']:>17,}")
+        print(f"conexões TCP novas: {state.connections - connections} "
+              f"(total na execução: {state.connections})")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+"""Servidor local que imita as APIs de Hotmart, Eduzz, Kiwify e Monetizze
+
+Atende os endpoints usados pelas integrações, com os mesmos formatos de
+paginação, sob um prefixo por plataforma:
+
+    /hotmart/v1/sales/history  /hotmart/v1/products  /hotmart/v1/purchases
+    /hotmart/oauth/token
+    /eduzz/v1/sales            /eduzz/v1/products    /eduzz/oauth/token
+    /kiwify/v1/orders          /kiwify/v1/products
+    /monetizze/2.1/transacoes  /monetizze/2.1/produtos  /monetizze/2.1/assinaturas
+
+Os registros são gerados sob demanda (o volume não ocupa memória) e o período
+pedido é ignorado: toda consulta devolve os `records` registros da plataforma.
+Tokens OAuth expiram depois de `token_ttl` requisições (401) e, a cada
+`throttle_every` requisições, a resposta é um 429 com Retry-After. Respostas
+maiores que 1 KiB saem com gzip quando o cliente aceita, e os catálogos de
+produtos trazem ETag (If-None-Match igual -> 304 sem corpo).
+
+Uso isolado:
+    python -m benchmarks.mock_marketplace [--port 8765] [--records 10000] [--latency 0.01]
+
+Nos benchmarks, mock_integrations() cria subclasses das integrações reais
+apontadas para o servidor.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from benchmarks.bench_normalize import hotmart_record, eduzz_record, kiwify_record, monetizze_record
+from integrations import EduzzIntegration, HotmartIntegration, KiwifyIntegration, MonetizzeIntegration
+
+PRODUCTS = [{'id': i, 'name': f"Produto {i}", 'price': 97.0 + i} for i in range(50)]
+GZIP_MIN_SIZE = 1024
+
+# Credenciais aceitas pelo servidor
+MOCK_CREDENTIALS = {
+    'Hotmart': {'api_key': 'mock', 'api_secret': 'mock', 'refresh_token': 'mock-refresh'},
+    'Eduzz': {'api_key': 'mock', 'api_secret': 'mock', 'refresh_token': 'mock-refresh'},
+    'Kiwify': {'api_key': 'mock-kiwify'},
+    'Monetizze': {'email': 'mock@exemplo.com', 'api_token': 'mock'},
+}
+
+
+class MarketplaceState:
+    """Configuração e contadores do servidor (compartilhados entre threads)"""
+
+    def __init__(self, records=10000, max_page_size=500, latency=0.0, token_ttl=0,
+                 throttle_every=0, retry_after=0.1):
+        self.records = records
+        self.max_page_size = max_page_size
+        self.latency = latency
+        self.token_ttl = token_ttl  # 0 = tokens não expiram
+        self.throttle_every = throttle_every  # 0 = sem 429
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._tokens = {}  # plataforma -> (token, requisições restantes)
+        self._issued = 0
+        self.connections = 0  # conexões TCP aceitas (mede o keep-alive)
+        self.counters = {}
+
+    def count(self, platform, key, amount=1):
+        with self._lock:
+            counters = self.counters.setdefault(platform, {
+                'requests': 0, 'pages': 0, 'records': 0, 'throttled': 0, 'unauthorized': 0, 'tokens': 0,
+                'not_modified': 0, 'bytes': 0
+            })
+            counters[key] += amount
+            return counters[key]
+
+    def issue_token(self, platform):
+        with self._lock:
+            self._issued += 1
+            token = f"tok-{self._issued}"
+            self._tokens[platform] = (token, self.token_ttl)
+        self.count(platform, 'tokens')
+        return token
+
+    def authorize(self, platform, token):
+        """Consome um uso do token; False quando inválido ou expirado"""
+        with self._lock:
+            current, remaining = self._tokens.get(platform, (None, 0))
+            if token != current:
+                return False
+            if self.token_ttl:
+                if remaining <= 0:
+                    return False
+                self._tokens[platform] = (current, remaining - 1)
+            return True
+
+    def page(self, platform, make_record, page_number, page_size):
+        """Registros da página (1 = primeira) e total de páginas"""
+        page_size = max(1, min(page_size, self.max_page_size))
+        total_pages = max(1, math.ceil(self.records / page_size))
+        start = (page_number - 1) * page_size
+        items = [make_record(i) for i in range(start, min(start + page_size, self.records))]
+        self.count(platform, 'pages')
+        with self._lock:
+            self.counters[platform]['records'] += len(items)
+        return items, page_size, total_pages
+
+
+def make_handler(state):
+    class MarketplaceHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Cabeçalho e corpo saem em escritas separadas: sem isso o Nagle
+        # somado ao ACK atrasado põe ~40 ms em cada resposta keep-alive
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with state._lock:
+                state.connections += 1
+
+        def _send(self, status, data, headers=None, platform=None, body=None):
+            body = json.dumps(data).encode('utf-8') if body is None else body
+            headers = dict(headers or {})
+            if len(body) >= GZIP_MIN_SIZE and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+                body = gzip.compress(body, compresslevel=5)
+                headers['Content-Encoding'] = 'gzip'
+            self.send_response(status)
+            if status != 304:
+                self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            if platform:
+                state.count(platform, 'bytes', len(body))
+
+        def _send_catalog(self, platform, data):
+            """Catálogo com ETag; 304 sem corpo quando o cliente já tem a versão atual"""
+            body = json.dumps(data).encode('utf-8')
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                state.count(platform, 'not_modified')
+                self._send(304, None, {'ETag': etag}, platform, body=b'')
+            else:
+                self._send(200, None, {'ETag': etag}, platform, body=body)
+
+        def _bearer(self):
+            return (self.headers.get('Authorization') or '').replace('Bearer ', '', 1)
+
+        def _gate(self, platform, oauth):
+            """Latência, 429 periódico e validação do token; True se pode responder"""
+            if state.latency:
+                time.sleep(state.latency)
+            requests_so_far = state.count(platform, 'requests')
+            if state.throttle_every and requests_so_far % state.throttle_every == 0:
+                state.count(platform, 'throttled')
+                self._send(429, {'error': 'too_many_requests'}, {'Retry-After': str(state.retry_after)})
+                return False
+            if oauth and not state.authorize(platform, self._bearer()):
+                state.count(platform, 'unauthorized')
+                self._send(401, {'error': 'invalid_token'})
+                return False
+            return True
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            platform = {'/hotmart/oauth/token': 'Hotmart', '/eduzz/oauth/token': 'Eduzz'}.get(url.path)
+            if platform is None:
+                self._send(404, {'error': 'not_found'})
+                return
+            self._send(200, {
+                'access_token': state.issue_token(platform),
+                'refresh_token': 'mock-refresh',
+                'expires_in': 3600
+            })
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = dict(parse_qsl(url.query))
+            route = ROUTES.get(url.path)
+            if route is None:
+                self._send(404, {'error': 'not_found'})
+                return
+            platform, oauth, respond = route
+            if not self._gate(platform, oauth):
+                return
+            if url.path in CATALOGS:
+                self._send_catalog(platform, respond(state, query))
+            else:
+                self._send(200, respond(state, query), platform=platform)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MarketplaceHandler
+
+
+def _hotmart_sales(state, query):
+    offset = int(query.get('page_token') or 0)
+    # O token é um deslocamento: a página sai do tamanho já limitado pelo servidor
+    page_size = max(1, min(int(query.get('max_results') or 50), state.max_page_size))
+    items, page_size, _ = state.page('Hotmart', hotmart_record, offset // page_size + 1, page_size)
+    next_offset = offset + len(items)
+    page_info = {'total_results': state.records, 'results_per_page': page_size}
+    if next_offset < state.records:
+        page_info['next_page_token'] = str(next_offset)
+    return {'items': items, 'page_info': page_info}
+
+
+def _eduzz_sales(state, query):
+    page = int(query.get('page') or 1)
+    items, _, total_pages = state.page('Eduzz', eduzz_record, page, int(query.get('per_page') or 100))
+    return {'data': items, 'paginator': {'page': page, 'totalPages': total_pages}}
+
+
+def _kiwify_orders(state, query):
+    page = int(query.get('page_number') or 1)
+    items, page_size, _ = state.page('Kiwify', kiwify_record, page, int(query.get('page_size') or 100))
+    return {'data': items, 'pagination': {'count': state.records, 'page_number': page, 'page_size': page_size}}
+
+
+def _monetizze_sales(state, query):
+    page = int(query.get('pagina') or 1)
+    items, _, total_pages = state.page('Monetizze', monetizze_record, page, MonetizzeIntegration.PAGE_SIZE)
+    return {'dados': items, 'paginas': total_pages, 'pagina': page}
+
+
+ROUTES = {
+    '/hotmart/v1/sales/history': ('Hotmart', True, _hotmart_sales),
+    '/hotmart/v1/purchases': ('Hotmart', True, lambda state, query: {'items': []}),
+    '/hotmart/v1/products': ('Hotmart', True, lambda state, query: {'items': PRODUCTS}),
+    '/eduzz/v1/sales': ('Eduzz', True, _eduzz_sales),
+    '/eduzz/v1/products': ('Eduzz', True, lambda state, query: {'data': PRODUCTS}),
+    '/kiwify/v1/orders': ('Kiwify', False, _kiwify_orders),
+    '/kiwify/v1/products': ('Kiwify', False, lambda state, query: {'data': PRODUCTS}),
+    '/monetizze/2.1/transacoes': ('Monetizze', False, _monetizze_sales),
+    '/monetizze/2.1/produtos': ('Monetizze', False, lambda state, query: {'dados': PRODUCTS}),
+    '/monetizze/2.1/assinaturas': ('Monetizze', False, lambda state, query: {'dados': []}),
+}
+
+
+CATALOGS = {'/hotmart/v1/products', '/eduzz/v1/products', '/kiwify/v1/products', '/monetizze/2.1/produtos'}
+
+
+def start_server(state, host='127.0.0.1', port=0):
+    """Sobe o servidor numa thread; retorna (servidor, URL base)"""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='mock-marketplace', daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def mock_integrations(base_url, rate_limit=None):
+    """Subclasses das integrações reais apontadas para o servidor local
+
+    Credenciais vêm de MOCK_CREDENTIALS (não do store); `rate_limit` substitui
+    o RATE_LIMIT da plataforma, para medir o transporte e não o limitador.
+    """
+    urls = {
+        HotmartIntegration: {'BASE_URL': f"{base_url}/hotmart/v1/", 'AUTH_URL': f"{base_url}/hotmart/oauth/token"},
+        EduzzIntegration: {'BASE_URL': f"{base_url}/eduzz/"},
+        KiwifyIntegration: {'BASE_URL': f"{base_url}/kiwify/v1/"},
+        MonetizzeIntegration: {'BASE_URL': f"{base_url}/monetizze/2.1/"},
+    }
+    classes = {}
+    for integration, attributes in urls.items():
+        platform = integration.PLATFORM_NAME
+        attributes = dict(attributes)
+        attributes['_load_credentials'] = lambda self, platform=platform: dict(MOCK_CREDENTIALS[platform])
+        if rate_limit is not None:
+            attributes['RATE_LIMIT'] = rate_limit
+        classes[platform] = type(f"Mock{integration.__name__}", (integration,), attributes)
+    return classes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="APIs simuladas das plataformas para testes locais")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--records', type=int, default=10000, help='registros por plataforma')
+    parser.add_argument('--max-page-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.0, help='segundos por requisição')
+    parser.add_argument('--token-ttl', type=int, default=0, help='requisições por token OAuth (0 = sem expiração)')
+    parser.add_argument('--throttle-every', type=int, default=0, help='um 429 a cada N requisições (0 = nunca)')
+    parser.add_argument('--retry-after', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    state = MarketplaceState(args.records, args.max_page_size, args.latency, args.token_ttl,
+                             args.throttle_every, args.retry_after)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"APIs simuladas em http://{args.host}:{args.port}/<plataforma>/...")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(state.counters, indent=2))
+
+
+if __name__ == '__main__':
+    main()
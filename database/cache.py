@@ -0,0 +1,136 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class QueryCache:
+    """Cache LRU com TTL para leituras por usuário, invalidado por geração
+
+    Cada usuário tem um contador de geração que faz parte da chave. Toda
+    escrita deste processo incrementa o contador, então entradas antigas
+    deixam de ser encontradas e saem por LRU/TTL.
+
+    Escritas de outros processos (receptor de webhooks, sincronização) chegam
+    pelo marcador do banco (data_versions.version, ver DBOperations): ele é
+    relido no máximo a cada `marker_interval` segundos e, se mudou, a geração
+    avança. Essas escritas aparecem, portanto, com até `marker_interval` de
+    atraso; escritas feitas fora de DBOperations (SQL manual, por exemplo)
+    só aparecem quando a entrada expira pelo TTL.
+    """
+
+    def __init__(self, max_entries=512, ttl=60.0, marker_interval=2.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.marker_interval = marker_interval
+        self._entries = OrderedDict()  # chave -> (expira_em, valor)
+        self._generations = {}
+        self._markers = {}  # user_id -> (verificado_em, marcador do banco)
+        self._epoch = 0  # incrementado por clear()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "external_invalidations": 0,
+        }
+
+    def generation(self, user_id):
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def marker_due(self, user_id):
+        """Indica se o marcador do banco deve ser relido para o usuário"""
+        with self._lock:
+            entry = self._markers.get(user_id)
+            return entry is None or time.monotonic() - entry[0] >= self.marker_interval
+
+    def observe_marker(self, user_id, marker):
+        """Registra o marcador lido do banco; se mudou, invalida o usuário"""
+        with self._lock:
+            previous = self._markers.get(user_id)
+            self._markers[user_id] = (time.monotonic(), marker)
+            if previous is not None and previous[1] != marker:
+                self._generations[user_id] = self._generations.get(user_id, 0) + 1
+                self._stats["external_invalidations"] += 1
+
+    def get(self, key):
+        """Retorna (encontrado, valor)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_user(self, user_id):
+        """Descarta (logicamente) tudo que foi lido para o usuário"""
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            self._stats["invalidations"] += 1
+            # A escrita também mudou o marcador: relê antes da próxima leitura
+            entry = self._markers.get(user_id)
+            if entry is not None:
+                self._markers[user_id] = (float('-inf'), entry[1])
+
+    def clear(self):
+        """Descarta todas as entradas (escritas sem usuário conhecido)"""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self._stats["invalidations"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+# Cache compartilhado por todas as instâncias de DBOperations do processo
+query_cache = QueryCache(
+    max_entries=int(os.getenv("QUERY_CACHE_SIZE", 512)),
+    ttl=float(os.getenv("QUERY_CACHE_TTL", 60)),
+    marker_interval=float(os.getenv("QUERY_CACHE_MARKER_INTERVAL", 2)),
+)
+
+
+def cached(method):
+    """Cacheia um método de DBOperations cujo primeiro argumento é o user_id
+
+    O valor em cache é compartilhado entre chamadas: não o modifique.
+    """
+    @functools.wraps(method)
+    def wrapper(self, user_id, *args, **kwargs):
+        cache = self.cache
+        if cache.marker_due(user_id):
+            cache.observe_marker(user_id, self._data_version(user_id))
+        key = (method.__name__, user_id, cache.generation(user_id), args, tuple(sorted(kwargs.items())))
+        found, value = cache.get(key)
+        if found:
+            return value
+        value = method(self, user_id, *args, **kwargs)
+        cache.set(key, value)
+        return value
+    return wrapper
@@ -1,8 +1,183 @@
 import mysql.connector
 from mysql.connector import Error
 import streamlit as st
+from . import migrations
+import threading
+import time
+import os
+
+
+class PoolExhaustedError(Error):
+    """Nenhuma conexão ficou livre dentro do tempo de espera do pool"""
+
+
+class PooledConnection:
+    """Conexão emprestada do pool; close() devolve ao pool em vez de fechar o socket"""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def is_connected(self):
+        return self._connection is not None and self._connection.is_connected()
+
+    def close(self):
+        """Devolve a conexão ao pool (pode ser chamado mais de uma vez)"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Pool de conexões MySQL limitado, thread-safe e compartilhado pelo processo"""
+
+    def __init__(self, connect_args, pool_size=10, timeout=10.0, recycle=1800):
+        self.connect_args = connect_args
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.recycle = recycle
+        self._idle = []  # pilha LIFO: reaproveita a conexão mais recente
+        self._created_at = {}
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "timeouts": 0,
+            "wait_time_total": 0.0,
+            "wait_time_max": 0.0,
+        }
+
+    # _open/_discard também rodam fora do lock (checkout em acquire); a
+    # contabilidade fica sob _cond (RLock, reentrante) para stats() consistente
+    def _open(self):
+        connection = mysql.connector.connect(**self.connect_args)
+        with self._cond:
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats["created"] += 1
+        return connection
+
+    def _discard(self, connection):
+        with self._cond:
+            self._created_at.pop(id(connection), None)
+            self._stats["discarded"] += 1
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _is_healthy(self, connection):
+        """Health check no checkout: idade da conexão e ping no servidor"""
+        with self._cond:
+            created_at = self._created_at.get(id(connection), 0)
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            return False
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def acquire(self):
+        """Empresta uma conexão saudável, esperando até `timeout` se o pool estiver cheio"""
+        started = time.monotonic()
+        with self._cond:
+            while not self._idle and self._in_use >= self.pool_size:
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolExhaustedError(
+                        msg=f"Pool de conexões esgotado ({self.pool_size} em uso)"
+                    )
+                self._cond.wait(remaining)
+            connection = self._idle.pop() if self._idle else None
+            self._in_use += 1
+            waited = time.monotonic() - started
+            self._stats["checkouts"] += 1
+            self._stats["wait_time_total"] += waited
+            self._stats["wait_time_max"] = max(self._stats["wait_time_max"], waited)
+
+        try:
+            if connection is not None and not self._is_healthy(connection):
+                self._discard(connection)
+                connection = None
+            if connection is None:
+                connection = self._open()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        """Recebe a conexão de volta, descartando transações pendentes"""
+        try:
+            if connection.is_connected():
+                connection.consume_results()
+                connection.rollback()
+                reusable = True
+            else:
+                reusable = False
+        except Error:
+            reusable = False
+
+        with self._cond:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append(connection)
+            else:
+                self._discard(connection)
+            self._cond.notify()
+
+    def resize(self, pool_size):
+        """Ajusta o tamanho máximo do pool em tempo de execução"""
+        with self._cond:
+            self.pool_size = pool_size
+            while self._idle and len(self._idle) + self._in_use > pool_size:
+                self._discard(self._idle.pop(0))
+            self._cond.notify_all()
+
+    def close_all(self):
+        """Fecha todas as conexões ociosas"""
+        with self._cond:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def stats(self):
+        """Retorna estatísticas do pool (em uso, ociosas, tempos de espera)"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                "pool_size": self.pool_size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+            })
+        checkouts = stats["checkouts"]
+        stats["wait_time_avg"] = stats["wait_time_total"] / checkouts if checkouts else 0.0
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
 
 class DatabaseManager:
+    # Ajustes do pool (podem ser sobrescritos por variáveis de ambiente)
+    POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+    POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 10))
+    POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+
     def __init__(self):
         """Inicializa o gerenciador de banco de dados com as credenciais do MySQL"""
         self.host = "localhost"
@@ -11,101 +186,55 @@ class DatabaseManager:
         self.password = "E2004!zo"
         self.connection = None
 
+    def get_pool(self):
+        """Retorna o pool do processo, criando-o na primeira chamada"""
+        global _pool
+        if _pool is None:
+            with _pool_lock:
+                if _pool is None:
+                    _pool = ConnectionPool(
+                        {
+                            "host": self.host,
+                            "database": self.database,
+                            "user": self.user,
+                            "password": self.password,
+                        },
+                        pool_size=self.POOL_SIZE,
+                        timeout=self.POOL_TIMEOUT,
+                        recycle=self.POOL_RECYCLE,
+                    )
+        return _pool
+
     def connect(self):
-        """Estabelece conexão com o banco de dados MySQL"""
+        """Empresta uma conexão do pool compartilhado (close() a devolve ao pool)"""
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password
-            )
-            if self.connection.is_connected():
-                return self.connection
+            self.connection = self.get_pool().acquire()
+            return self.connection
         except Error as e:
             st.error(f"Erro ao conectar ao MySQL: {e}")
             return None
 
     def disconnect(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.connection and self.connection.is_connected():
+        """Devolve ao pool a última conexão emprestada"""
+        if self.connection:
             self.connection.close()
+            self.connection = None
+
+    def pool_stats(self):
+        """Estatísticas do pool de conexões"""
+        return self.get_pool().stats()
 
     def initialize_database(self):
-        """Cria a estrutura inicial do banco de dados se não existir"""
+        """Aplica as migrações pendentes do schema (verificado uma vez por processo)
+
+        Retorna as versões aplicadas. Falhas de conexão ou de migração
+        levantam mysql.connector.Error; a exibição fica com quem chama.
+        """
+        if migrations.is_schema_current():
+            return []
+
+        conn = self.get_pool().acquire()
         try:
-            conn = self.connect()
-            cursor = conn.cursor()
-            
-            # Criação das tabelas
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-            """)
-            
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS campaigns (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                platform VARCHAR(50) NOT NULL,
-                budget DECIMAL(10, 2) NOT NULL,
-                start_date DATE NOT NULL,
-                end_date DATE,
-                status VARCHAR(20) DEFAULT 'active',
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-            """)
-            
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                campaign_id INT NOT NULL,
-                amount DECIMAL(10, 2) NOT NULL,
-                description VARCHAR(255),
-                date DATE NOT NULL,
-                category VARCHAR(50) NOT NULL,
-                FOREIGN KEY (campaign_id) REFERENCES campaigns(id)
-            )
-            """)
-            
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS sales (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                product_name VARCHAR(100) NOT NULL,
-                amount DECIMAL(10, 2) NOT NULL,
-                quantity INT NOT NULL,
-                sale_date DATE NOT NULL,
-                platform VARCHAR(50) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, 
-                FOREIGN KEY (user_id) REFERENCES users(id)
-        )
-    """)
-
-            cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                user_id INT NOT NULL,
-                name VARCHAR(100) NOT NULL,
-                description TEXT,
-                price DECIMAL(10, 2) NOT NULL,
-                cost DECIMAL(10, 2) DEFAULT 0.00,
-                platform VARCHAR(50) NOT NULL,
-                FOREIGN KEY (user_id) REFERENCES users(id)
-            )
-            """)
-            
-            conn.commit()
-            st.success("Banco de dados inicializado com sucesso!")
-        except Error as e:
-            st.error(f"Erro ao inicializar banco de dados: {e}")
+            return migrations.run_migrations(conn)
         finally:
-            if conn.is_connected():
-                cursor.close()
-                conn.close()
\ No newline at end of file
+            conn.close()
@@ -0,0 +1,80 @@
+"""Montagem de DataFrames tipados a partir de linhas em tupla do cursor
+
+Em vez de um dict por linha (cursor dictionary=True) e colunas DECIMAL como
+objetos Python, as colunas são montadas de uma vez e convertidas para tipos
+nativos do NumPy/pandas.
+"""
+import numpy as np
+import pandas as pd
+
+# Tipos aceitos em `dtypes`:
+#   'money'    -> float64 (reais)
+#   'cents'    -> int64 (centavos; Int64 anulável se houver NULL)
+#   'int'      -> int64 (Int64 anulável se houver NULL)
+#   'float'    -> float64
+#   'datetime' -> datetime64 (DATE e DATETIME)
+#   'category' -> categórico (textos repetidos como plataforma e produto)
+#   None       -> inferido pelo pandas
+
+
+def _to_float(values):
+    try:
+        # Caminho rápido: sem NULL, Decimal/int convertidos por float()
+        return np.fromiter(map(float, values), dtype='float64', count=len(values))
+    except TypeError:
+        return np.array(values, dtype='float64')
+
+
+def _to_int(values, scale=None):
+    floats = _to_float(values)
+    if scale is not None:
+        floats = np.rint(floats * scale)
+    if np.isnan(floats).any():
+        return pd.array(floats, dtype='Int64')
+    return floats.astype('int64')
+
+
+def _convert(values, kind):
+    if kind == 'money' or kind == 'float':
+        return _to_float(values)
+    if kind == 'cents':
+        return _to_int(values, scale=100)
+    if kind == 'int':
+        return _to_int(values)
+    if kind == 'datetime':
+        return pd.to_datetime(pd.Index(values)).to_numpy()
+    if kind == 'category':
+        return pd.Categorical(list(values))
+    if kind is None:
+        return list(values)
+    raise ValueError(f"Tipo de coluna desconhecido: {kind}")
+
+
+def build_frame(rows, columns, dtypes=None):
+    """Monta um DataFrame coluna a coluna a partir de uma lista de tuplas"""
+    dtypes = dtypes or {}
+    if rows:
+        column_values = list(zip(*rows))
+    else:
+        column_values = [() for _ in columns]
+
+    return pd.DataFrame({
+        name: _convert(values, dtypes.get(name))
+        for name, values in zip(columns, column_values)
+    }, columns=list(columns))
+
+
+# Tipos padrão das colunas de vendas
+SALES_DTYPES = {
+    'id': 'int',
+    'user_id': 'int',
+    'product_name': 'category',
+    'amount': 'money',
+    'quantity': 'int',
+    'cost': 'money',
+    'sale_date': 'datetime',
+    'platform': 'category',
+    'created_at': 'datetime',
+    'total_sale': 'money',
+    'profit': 'money',
+}
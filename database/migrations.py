@@ -0,0 +1,250 @@
+import threading
+from mysql.connector import Error, errorcode
+from . import rollups
+
+# Versão do schema já verificada neste processo (None = ainda não verificada)
+_checked_version = None
+_lock = threading.Lock()
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+
+def _add_column(cursor, table, column, definition):
+    """ALTER TABLE ADD COLUMN idempotente (o MySQL não suporta IF NOT EXISTS aqui)"""
+    if not _column_exists(cursor, table, column):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def _foreign_key_exists(cursor, table, name):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+          AND CONSTRAINT_NAME = %s AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+    """, (table, name))
+    return cursor.fetchone()[0] > 0
+
+
+def _add_index(cursor, table, index, columns, unique=False):
+    """CREATE INDEX idempotente"""
+    if not _index_exists(cursor, table, index):
+        kind = "UNIQUE INDEX" if unique else "INDEX"
+        cursor.execute(f"CREATE {kind} {index} ON {table} ({columns})")
+
+
+def _001_initial_schema(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS users (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        username VARCHAR(50) UNIQUE NOT NULL,
+        email VARCHAR(100) UNIQUE NOT NULL,
+        password VARCHAR(255) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS campaigns (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        platform VARCHAR(50) NOT NULL,
+        budget DECIMAL(10, 2) NOT NULL,
+        start_date DATE NOT NULL,
+        end_date DATE,
+        status VARCHAR(20) DEFAULT 'active',
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        campaign_id INT NOT NULL,
+        amount DECIMAL(10, 2) NOT NULL,
+        description VARCHAR(255),
+        date DATE NOT NULL,
+        category VARCHAR(50) NOT NULL,
+        FOREIGN KEY (campaign_id) REFERENCES campaigns(id)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sales (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        product_name VARCHAR(100) NOT NULL,
+        amount DECIMAL(10, 2) NOT NULL,
+        quantity INT NOT NULL,
+        sale_date DATE NOT NULL,
+        platform VARCHAR(50) NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS products (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        user_id INT NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        description TEXT,
+        price DECIMAL(10, 2) NOT NULL,
+        cost DECIMAL(10, 2) DEFAULT 0.00,
+        platform VARCHAR(50) NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+
+
+def _002_sales_cost(cursor):
+    # create_sale já grava o custo unitário, mas a coluna nunca foi criada
+    _add_column(cursor, "sales", "cost", "DECIMAL(10, 2) NOT NULL DEFAULT 0.00 AFTER quantity")
+
+
+def _003_indexes(cursor):
+    _add_index(cursor, "sales", "idx_sales_user_date", "user_id, sale_date")
+    _add_index(cursor, "sales", "idx_sales_user_created", "user_id, created_at")
+    _add_index(cursor, "products", "idx_products_user_name", "user_id, name")
+    _add_index(cursor, "expenses", "idx_expenses_campaign_date", "campaign_id, date")
+
+
+def _004_sales_daily_rollup(cursor):
+    cursor.execute(rollups.CREATE_ROLLUP_TABLE)
+    # A coluna status só existe a partir da migração 7, que recalcula por status
+    rollups.rebuild(cursor, status=None)
+
+
+def _005_sales_product_id(cursor):
+    _add_column(cursor, "sales", "product_id", "INT NULL AFTER user_id")
+    # Vendas antigas só têm o nome; em nomes duplicados fica o produto mais antigo
+    cursor.execute("""
+        UPDATE sales s
+        JOIN (
+            SELECT user_id, name, MIN(id) AS id
+            FROM products
+            GROUP BY user_id, name
+        ) p ON p.user_id = s.user_id AND p.name = s.product_name
+        SET s.product_id = p.id
+        WHERE s.product_id IS NULL
+    """)
+    _add_index(cursor, "sales", "idx_sales_product", "product_id")
+    if not _foreign_key_exists(cursor, "sales", "fk_sales_product"):
+        cursor.execute("""
+            ALTER TABLE sales
+            ADD CONSTRAINT fk_sales_product FOREIGN KEY (product_id) REFERENCES products(id)
+        """)
+
+
+def _006_sync_state(cursor):
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS sync_state (
+        user_id INT NOT NULL,
+        platform VARCHAR(50) NOT NULL,
+        high_water_mark DATETIME NULL,
+        last_status VARCHAR(20) NOT NULL DEFAULT 'ok',
+        last_rows INT NOT NULL DEFAULT 0,
+        last_synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, platform),
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+
+
+def _007_sales_external_id(cursor):
+    _add_column(cursor, "sales", "external_id", "VARCHAR(100) NULL AFTER platform")
+    _add_column(cursor, "sales", "status", "VARCHAR(20) NOT NULL DEFAULT 'approved' AFTER external_id")
+    # Vendas manuais ficam com external_id NULL e não colidem no índice único
+    _add_index(cursor, "sales", "uq_sales_platform_external", "user_id, platform, external_id", unique=True)
+    rollups.rebuild(cursor)
+
+
+def _008_data_versions(cursor):
+    # Marcador por usuário comparado pelos caches de consulta de cada processo
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS data_versions (
+        user_id INT PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """)
+
+
+# (versão, descrição, função) em ordem crescente; nunca altere uma migração já publicada
+MIGRATIONS = [
+    (1, "Tabelas iniciais", _001_initial_schema),
+    (2, "Coluna cost em sales", _002_sales_cost),
+    (3, "Índices compostos de vendas, produtos e despesas", _003_indexes),
+    (4, "Agregados diários de vendas", _004_sales_daily_rollup),
+    (5, "Chave product_id em sales", _005_sales_product_id),
+    (6, "Estado da sincronização incremental", _006_sync_state),
+    (7, "Identificador externo e status em sales", _007_sales_external_id),
+    (8, "Versão dos dados por usuário", _008_data_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _current_version(cursor):
+    try:
+        cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+        return cursor.fetchone()[0]
+    except Error as e:
+        if e.errno != errorcode.ER_NO_SUCH_TABLE:
+            raise
+        return 0
+
+
+def is_schema_current():
+    """Indica se o schema já foi verificado/atualizado neste processo"""
+    return _checked_version == LATEST_VERSION
+
+
+def run_migrations(conn):
+    """Aplica as migrações pendentes e retorna as versões aplicadas"""
+    global _checked_version
+    with _lock:
+        if _checked_version == LATEST_VERSION:
+            return []
+
+        cursor = conn.cursor()
+        try:
+            version = _current_version(cursor)
+            applied = []
+            if version < LATEST_VERSION:
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INT PRIMARY KEY,
+                    description VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """)
+                for number, description, migrate in MIGRATIONS:
+                    if number <= version:
+                        continue
+                    migrate(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                        (number, description)
+                    )
+                    conn.commit()
+                    applied.append(number)
+
+            _checked_version = LATEST_VERSION
+            return applied
+        finally:
+            cursor.close()
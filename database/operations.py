@@ -1,27 +1,66 @@
 from .db import DatabaseManager
+from . import rollups
+from .frames import build_frame, SALES_DTYPES
+from .cache import query_cache, cached
+from mysql.connector import errorcode
 import streamlit as st
 from datetime import datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+import os
+import pandas as pd
 
 class DBOperations:
     def __init__(self):
         self.db = DatabaseManager()
-    
-    def create_sale(self, user_id, product_name, amount, quantity, sale_date, platform, cost=0.0):
-        """Registra uma nova venda no banco de dados"""
+        self.cache = query_cache
+
+    def cache_stats(self):
+        """Acertos, falhas e tamanho do cache de consultas"""
+        return self.cache.stats()
+
+    def _owner_of(self, cursor, table, row_id):
+        """user_id dono de um registro (para invalidar o cache após escritas por id)"""
+        cursor.execute(f"SELECT user_id FROM {table} WHERE id = %s", (row_id,))
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+    def _link_sales_by_name(self, cursor, user_id, product_id, name):
+        """Liga ao produto as vendas do usuário gravadas só com o nome
+
+        Importações, integrações e webhooks podem registrar vendas antes do
+        produto existir; sem isso elas ficariam sem custo no lucro.
+        """
+        cursor.execute("""
+            UPDATE sales SET product_id = %s
+            WHERE user_id = %s AND product_name = %s AND product_id IS NULL
+        """, (product_id, user_id, name))
+
+    def _touch_user(self, cursor, user_id):
+        """Avança a versão dos dados do usuário (usar antes do commit da escrita)
+
+        É o marcador que os caches de outros processos comparam para se
+        invalidar (ver QueryCache).
+        """
+        if user_id is None:
+            return
+        cursor.execute("""
+            INSERT INTO data_versions (user_id, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """, (user_id,))
+
+    def _data_version(self, user_id):
+        """Versão atual dos dados do usuário no banco (None se não der para ler)"""
         conn = self.db.connect()
+        if conn is None:
+            return None
         cursor = conn.cursor()
         try:
-            cursor.execute(
-                """INSERT INTO sales 
-                (user_id, product_name, amount, quantity, cost, sale_date, platform) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-                (user_id, product_name, amount, quantity, cost, sale_date, platform)
-            )
-            conn.commit()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao registrar venda: {e}")
-            return False
+            cursor.execute("SELECT version FROM data_versions WHERE user_id = %s", (user_id,))
+            row = cursor.fetchone()
+            return row[0] if row else 0
+        except Exception:
+            return None
         finally:
             cursor.close()
             conn.close()
@@ -71,7 +110,10 @@ class DBOperations:
                 VALUES (%s, %s, %s, %s, %s)""",
                 (user_id, name, description, price, platform)
             )
+            self._link_sales_by_name(cursor, user_id, cursor.lastrowid, name)
+            self._touch_user(cursor, user_id)
             conn.commit()
+            self.cache.invalidate_user(user_id)
             return True
         except Exception as e:
             st.error(f"Erro ao criar produto: {e}")
@@ -85,13 +127,16 @@ class DBOperations:
         conn = self.db.connect()
         cursor = conn.cursor()
         try:
-            # Verifica se existem vendas associadas
-            cursor.execute("SELECT COUNT(*) FROM sales WHERE product_name IN (SELECT name FROM products WHERE id = %s)", (product_id,))
-            if cursor.fetchone()[0] > 0:
+            # Verifica se existem vendas associadas (índice em sales.product_id)
+            cursor.execute("SELECT 1 FROM sales WHERE product_id = %s LIMIT 1", (product_id,))
+            if cursor.fetchone():
                 return {"success": False, "message": "Este produto possui vendas associadas"}
             
+            owner = self._owner_of(cursor, "products", product_id)
             cursor.execute("DELETE FROM products WHERE id = %s", (product_id,))
+            self._touch_user(cursor, owner)
             conn.commit()
+            self.cache.invalidate_user(owner)
             return {"success": True, "message": "Produto excluído com sucesso"}
         except Exception as e:
             return {"success": False, "message": f"Erro ao excluir produto: {e}"}
@@ -99,6 +144,7 @@ class DBOperations:
             cursor.close()
             conn.close()
     
+    @cached
     def get_user_products(self, user_id):
         """Obtém todos os produtos de um usuário"""
         conn = self.db.connect()
@@ -115,13 +161,18 @@ class DBOperations:
         conn = self.db.connect()
         cursor = conn.cursor()
         try:
+            owner = self._owner_of(cursor, "products", product_id)
             cursor.execute(
                 """UPDATE products 
                 SET name = %s, description = %s, price = %s, platform = %s
                 WHERE id = %s""",
                 (name, description, price, platform, product_id)
             )
+            if owner is not None:
+                self._link_sales_by_name(cursor, owner, product_id, name)
+            self._touch_user(cursor, owner)
             conn.commit()
+            self.cache.invalidate_user(owner)
             return True
         except Exception as e:
             st.error(f"Erro ao atualizar produto: {e}")
@@ -130,21 +181,6 @@ class DBOperations:
             cursor.close()
             conn.close()
     
-    def delete_product(self, product_id):
-        """Exclui um produto"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        try:
-            cursor.execute("DELETE FROM products WHERE id = %s", (product_id,))
-            conn.commit()
-            return True
-        except Exception as e:
-            st.error(f"Erro ao excluir produto: {e}")
-            return False
-        finally:
-            cursor.close()
-            conn.close()
-    
     # Operações de Campanhas
     def create_campaign(self, user_id, name, platform, budget, start_date, end_date=None):
         """Cria uma nova campanha de marketing"""
@@ -157,7 +193,9 @@ class DBOperations:
                 VALUES (%s, %s, %s, %s, %s, %s)""",
                 (user_id, name, platform, budget, start_date, end_date)
             )
+            self._touch_user(cursor, user_id)
             conn.commit()
+            self.cache.invalidate_user(user_id)
             return cursor.lastrowid
         except Exception as e:
             st.error(f"Erro ao criar campanha: {e}")
@@ -176,8 +214,11 @@ class DBOperations:
             if cursor.fetchone()[0] > 0:
                 return {"success": False, "message": "Esta campanha possui despesas associadas"}
             
+            owner = self._owner_of(cursor, "campaigns", campaign_id)
             cursor.execute("DELETE FROM campaigns WHERE id = %s", (campaign_id,))
+            self._touch_user(cursor, owner)
             conn.commit()
+            self.cache.invalidate_user(owner)
             return {"success": True, "message": "Campanha excluída com sucesso"}
         except Exception as e:
             return {"success": False, "message": f"Erro ao excluir campanha: {e}"}
@@ -185,6 +226,7 @@ class DBOperations:
             cursor.close()
             conn.close()
     
+    @cached
     def get_user_campaigns(self, user_id):
         """Obtém todas as campanhas de um usuário"""
         conn = self.db.connect()
@@ -197,26 +239,308 @@ class DBOperations:
             conn.close()
     
     # Operações de Vendas
-    def create_sale(self, user_id, product_name, amount, quantity, sale_date, platform, cost=0.0):
-        """Registra uma nova venda no banco de dados"""
+    def create_sale(self, user_id, product_name, amount, quantity, sale_date, platform, cost=0.0, product_id=None):
+        """Registra uma nova venda no banco de dados
+
+        Sem `product_id`, o produto é resolvido pelo nome dentro do próprio INSERT.
+        """
         conn = self.db.connect()
         cursor = conn.cursor()
         try:
             cursor.execute(
                 """INSERT INTO sales 
-                (user_id, product_name, amount, quantity, cost, sale_date, platform) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-                (user_id, product_name, amount, quantity, cost, sale_date, platform)
+                (user_id, product_id, product_name, amount, quantity, cost, sale_date, platform) 
+                VALUES (%s, COALESCE(%s, (SELECT MIN(id) FROM products WHERE user_id = %s AND name = %s)),
+                        %s, %s, %s, %s, %s, %s)""",
+                (user_id, product_id, user_id, product_name,
+                 product_name, amount, quantity, cost, sale_date, platform)
             )
+            # Agregado diário atualizado na mesma transação
+            rollups.add_sale(cursor, user_id, sale_date, platform, product_name, amount, quantity, cost)
+            self._touch_user(cursor, user_id)
             conn.commit()
+            self.cache.invalidate_user(user_id)
             return True
         except Exception as e:
+            conn.rollback()
             st.error(f"Erro ao registrar venda: {e}")
             return False
         finally:
             cursor.close()
             conn.close()
     
+    BULK_CHUNK_SIZE = 1000
+    MAX_BULK_ERRORS = 20
+    DEADLOCK_RETRIES = 2
+    RETRYABLE_ERRORS = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+    def _prepare_sale_row(self, row):
+        """Valida uma venda do lote e devolve a tupla na ordem das colunas do INSERT"""
+        product_name = row.get('product_name')
+        platform = row.get('platform')
+        sale_date = row.get('sale_date')
+        if any(value is None or pd.isna(value) or value == '' for value in (product_name, platform, sale_date)):
+            raise ValueError("product_name, platform e sale_date são obrigatórios")
+
+        if 'amount_cents' in row:
+            # Frames normalizados das integrações trazem o valor em centavos
+            amount = Decimal(int(row['amount_cents'])).scaleb(-2)
+        else:
+            amount = Decimal(str(row['amount']))
+        quantity = int(row.get('quantity', 1))
+        cost = row.get('cost')
+        cost = Decimal(0) if cost is None or pd.isna(cost) else Decimal(str(cost))
+        if not amount.is_finite():
+            raise ValueError(f"valor inválido: {amount}")
+        if not cost.is_finite():
+            raise ValueError(f"custo inválido: {cost}")
+        if quantity <= 0:
+            raise ValueError(f"quantidade inválida: {quantity}")
+
+        # Timestamps do pandas/datetime e textos ISO (dicts, CSV) viram DATE,
+        # o mesmo tipo lido do banco na comparação dos upserts
+        if isinstance(sale_date, datetime):
+            sale_date = sale_date.date()
+        elif isinstance(sale_date, str):
+            sale_date = datetime.fromisoformat(sale_date.strip()).date()
+        product_id = row.get('product_id')
+        product_id = None if product_id is None or pd.isna(product_id) else int(product_id)
+        external_id = row.get('external_id')
+        external_id = None if external_id is None or pd.isna(external_id) or external_id == '' else str(external_id)
+        status = row.get('status')
+        status = rollups.COUNTED_STATUS if status is None or pd.isna(status) else str(status).lower()
+        return (str(product_name), amount, quantity, cost, sale_date, str(platform), product_id, external_id, status)
+
+    def _product_ids(self, cursor, user_id):
+        """Mapa nome -> id dos produtos do usuário (uma consulta por lote)"""
+        cursor.execute(
+            "SELECT name, MIN(id) FROM products WHERE user_id = %s GROUP BY name",
+            (user_id,)
+        )
+        return dict(cursor.fetchall())
+
+    def _existing_sales(self, cursor, user_id, keys, for_update=False):
+        """Estado das vendas já importadas: (platform, external_id) -> linha
+
+        Com `for_update` as chaves (e as lacunas do índice, para as que ainda
+        não existem) ficam travadas até o fim da transação.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ", ".join(["(%s, %s)"] * len(keys))
+        cursor.execute(f"""
+            SELECT platform, external_id, product_name, amount, quantity, sale_date, status
+            FROM sales
+            WHERE user_id = %s AND (platform, external_id) IN ({placeholders})
+            {"FOR UPDATE" if for_update else ""}
+        """, [user_id, *(value for key in keys for value in key)])
+        return {
+            (platform, external_id): (product_name, amount, quantity, sale_date, status)
+            for platform, external_id, product_name, amount, quantity, sale_date, status in cursor.fetchall()
+        }
+
+    def _upsert_keyed_sales(self, cursor, user_id, values, product_ids):
+        """Grava vendas com external_id: só as novas ou alteradas vão para o banco
+
+        Retorna (novas, alteradas, inalteradas, dias cujo agregado precisa ser
+        recalculado). Replays de uma sincronização custam apenas o SELECT.
+        """
+        latest = {}
+        for value in values:
+            latest[(value[5], value[7])] = value  # a última ocorrência no lote vale
+        # Leitura com trava: outro escritor não insere as mesmas chaves entre este
+        # SELECT e o INSERT (a venda seria somada duas vezes nos agregados)
+        existing = self._existing_sales(cursor, user_id, latest, for_update=True)
+
+        new_rows, changed_rows, stale_dates = [], [], set()
+        for key, value in latest.items():
+            current = existing.get(key)
+            if current is None:
+                new_rows.append(value)
+            elif current != (value[0], value[1], value[2], value[4], value[8]):
+                changed_rows.append(value)
+                stale_dates.update((current[3], value[4]))
+
+        rows = new_rows + changed_rows
+        if rows:
+            cursor.executemany(
+                """INSERT INTO sales
+                (user_id, product_id, product_name, amount, quantity, cost, sale_date, platform, external_id, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    product_id = COALESCE(product_id, VALUES(product_id)),
+                    product_name = VALUES(product_name),
+                    amount = VALUES(amount),
+                    quantity = VALUES(quantity),
+                    sale_date = VALUES(sale_date),
+                    status = VALUES(status)""",
+                [
+                    (user_id, value[6] if value[6] is not None else product_ids.get(value[0]), *value[:6], *value[7:])
+                    for value in rows
+                ]
+            )
+        return new_rows, changed_rows, len(latest) - len(rows), stale_dates
+
+    def _write_sales_chunk(self, cursor, user_id, values, product_ids):
+        """Grava um bloco já validado e seus agregados (sem commit)
+
+        Retorna (inseridas, atualizadas, inalteradas).
+        """
+        plain = [value for value in values if value[7] is None]
+        keyed = [value for value in values if value[7] is not None]
+        if plain:
+            cursor.executemany(
+                """INSERT INTO sales
+                (user_id, product_id, product_name, amount, quantity, cost, sale_date, platform, status)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+                [
+                    (user_id, value[6] if value[6] is not None else product_ids.get(value[0]),
+                     *value[:6], value[8])
+                    for value in plain
+                ]
+            )
+        new_rows, changed_rows, unchanged, stale_dates = self._upsert_keyed_sales(
+            cursor, user_id, keyed, product_ids
+        )
+        # Dias com vendas alteradas são recalculados; o resto é somado
+        if stale_dates:
+            rollups.rebuild(cursor, user_id, dates=stale_dates)
+        rollups.add_sales(cursor, user_id, [
+            value[:6] for value in plain + new_rows
+            if value[8] == rollups.COUNTED_STATUS and value[4] not in stale_dates
+        ])
+        if plain or new_rows or changed_rows:
+            self._touch_user(cursor, user_id)
+        return len(plain) + len(new_rows), len(changed_rows), unchanged
+
+    def _iter_row_chunks(self, rows, chunk_size):
+        """Divide um iterável de dicts ou um DataFrame em listas de dicts"""
+        if isinstance(rows, pd.DataFrame):
+            for start in range(0, len(rows), chunk_size):
+                yield rows.iloc[start:start + chunk_size].to_dict('records')
+            return
+
+        iterator = iter(rows)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    def create_sales_bulk(self, user_id, rows, chunk_size=None):
+        """Insere vendas em lote: executemany multi-linha, uma transação por bloco
+
+        `rows` pode ser um iterável de dicts ou um DataFrame com as colunas
+        product_name, amount (ou amount_cents), quantity, sale_date, platform e (opcionais) cost,
+        product_id, external_id e status; sem product_id o produto é resolvido
+        pelo nome. Linhas com external_id são upserts idempotentes por
+        (platform, external_id): reimportar não duplica e atualiza o status.
+        Retorna {"inserted", "updated", "unchanged", "failed", "errors"}.
+        """
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        report = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+
+        def record_error(message):
+            if len(report["errors"]) < self.MAX_BULK_ERRORS:
+                report["errors"].append(message)
+
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            product_ids = self._product_ids(cursor, user_id)
+            for chunk in self._iter_row_chunks(rows, chunk_size):
+                values = []
+                for row in chunk:
+                    try:
+                        values.append(self._prepare_sale_row(row))
+                    except (KeyError, TypeError, ValueError, ArithmeticError) as e:
+                        report["failed"] += 1
+                        record_error(f"Linha inválida ({e}): {row}")
+                if not values:
+                    continue
+
+                for attempt in range(self.DEADLOCK_RETRIES + 1):
+                    try:
+                        inserted, updated, unchanged = self._write_sales_chunk(cursor, user_id, values, product_ids)
+                        conn.commit()
+                        if inserted or updated:
+                            self.cache.invalidate_user(user_id)
+                        report["inserted"] += inserted
+                        report["updated"] += updated
+                        report["unchanged"] += unchanged
+                        break
+                    except Exception as e:
+                        conn.rollback()
+                        # Escritores simultâneos (webhooks x sincronização) podem
+                        # se travar nos mesmos intervalos do índice: o bloco é refeito
+                        if getattr(e, 'errno', None) in self.RETRYABLE_ERRORS and attempt < self.DEADLOCK_RETRIES:
+                            continue
+                        report["failed"] += len(values)
+                        record_error(f"Bloco de {len(values)} vendas descartado: {e}")
+                        break
+            return report
+        finally:
+            cursor.close()
+            conn.close()
+
+    def update_sales_status(self, user_id, platform, updates):
+        """Atualiza o status de vendas importadas a partir de pares (external_id, status)
+
+        Usado para reembolsos, cancelamentos e chargebacks informados pela
+        plataforma; os agregados dos dias afetados são recalculados.
+        """
+        statuses = {str(external_id): str(status).lower() for external_id, status in updates}
+        updated = 0
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            keys = iter(statuses)
+            while True:
+                chunk = list(islice(keys, self.BULK_CHUNK_SIZE))
+                if not chunk:
+                    break
+                existing = self._existing_sales(cursor, user_id, [(platform, key) for key in chunk])
+                changed = [
+                    (statuses[external_id], user_id, platform, external_id)
+                    for (_, external_id), current in existing.items()
+                    if current[4] != statuses[external_id]
+                ]
+                if not changed:
+                    continue
+                cursor.executemany(
+                    "UPDATE sales SET status = %s WHERE user_id = %s AND platform = %s AND external_id = %s",
+                    changed
+                )
+                rollups.rebuild(cursor, user_id, dates={
+                    existing[(platform, external_id)][3] for _, _, _, external_id in changed
+                })
+                self._touch_user(cursor, user_id)
+                conn.commit()
+                updated += len(changed)
+            if updated:
+                self.cache.invalidate_user(user_id)
+            return {"success": True, "updated": updated}
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao atualizar status de vendas: {e}")
+            return {"success": False, "updated": updated, "message": str(e)}
+        finally:
+            cursor.close()
+            conn.close()
+
+    def import_sales_csv(self, user_id, file, chunk_size=None, **read_csv_kwargs):
+        """Importa vendas de um CSV em blocos, sem carregar o arquivo inteiro"""
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        report = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+        for frame in pd.read_csv(file, chunksize=chunk_size, parse_dates=['sale_date'], **read_csv_kwargs):
+            partial = self.create_sales_bulk(user_id, frame, chunk_size)
+            for key in ("inserted", "updated", "unchanged", "failed"):
+                report[key] += partial[key]
+            report["errors"].extend(partial["errors"][:self.MAX_BULK_ERRORS - len(report["errors"])])
+        return report
+
+    @cached
     def get_user_sales(self, user_id, limit=None):
         """Obtém vendas do usuário com suporte a limite"""
         conn = self.db.connect()
@@ -235,6 +559,61 @@ class DBOperations:
             cursor.close()
             conn.close()
     
+    # Leituras em streaming (cursor sem buffer, memória limitada ao bloco)
+    STREAM_CHUNK_SIZE = 5000
+
+    def _iter_query(self, query, params, chunk_size=None, as_frame=False):
+        """Executa a consulta com cursor sem buffer e entrega o resultado em blocos
+
+        Com as_frame=True cada bloco é um DataFrame; senão cada linha é um dict.
+        A conexão fica emprestada até o gerador terminar ou ser fechado.
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        conn = self.db.connect()
+        cursor = conn.cursor(buffered=False)
+        try:
+            cursor.execute(query, params)
+            columns = cursor.column_names
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if as_frame:
+                    yield pd.DataFrame.from_records(rows, columns=columns)
+                else:
+                    for row in rows:
+                        yield dict(zip(columns, row))
+        finally:
+            # Descarta o restante do resultado se o consumidor parou antes do fim
+            conn.consume_results()
+            cursor.close()
+            conn.close()
+
+    def iter_user_sales(self, user_id, chunk_size=None, as_frame=False):
+        """Versão em streaming de get_user_sales (mais recentes primeiro)"""
+        return self._iter_query(
+            "SELECT * FROM sales WHERE user_id = %s ORDER BY created_at DESC",
+            (user_id,), chunk_size, as_frame
+        )
+
+    def iter_sales_profit_data(self, user_id, start_date=None, end_date=None, chunk_size=None, as_frame=False):
+        """Versão em streaming de get_sales_profit_data"""
+        query, params = self._sales_profit_query(user_id, start_date, end_date)
+        return self._iter_query(query, params, chunk_size, as_frame)
+
+    def export_user_sales_csv(self, user_id, file, chunk_size=None):
+        """Exporta todas as vendas do usuário para CSV em blocos; retorna o total de linhas"""
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, 'w', newline='', encoding='utf-8') as handle:
+                return self.export_user_sales_csv(user_id, handle, chunk_size)
+
+        total = 0
+        for frame in self.iter_user_sales(user_id, chunk_size, as_frame=True):
+            frame.to_csv(file, header=total == 0, index=False)
+            total += len(frame)
+        return total
+
+    @cached
     def get_sales_date_range(self, user_id):
         """Obtém o intervalo de datas das vendas"""
         conn = self.db.connect()
@@ -250,7 +629,210 @@ class DBOperations:
             cursor.close()
             conn.close()
     
+    # Agregações parametrizadas sobre sales_daily_rollup (só vendas aprovadas)
+    AGGREGATE_GROUPS = {
+        'day': ("sale_date", "period"),
+        'week': ("DATE_SUB(sale_date, INTERVAL WEEKDAY(sale_date) DAY)", "period"),
+        'month': ("DATE_SUB(sale_date, INTERVAL DAYOFMONTH(sale_date) - 1 DAY)", "period"),
+        'product': ("product_name", "product_name"),
+        'platform': ("platform", "platform"),
+    }
+    AGGREGATE_METRICS = ('revenue', 'units', 'cost', 'sales_count')
+    AGGREGATE_DTYPES = {
+        'period': 'datetime',
+        'product_name': 'category',
+        'platform': 'category',
+        'revenue': 'money',
+        'units': 'int',
+        'cost': 'money',
+        'sales_count': 'int',
+    }
+
+    def aggregate_sales(self, user_id, group_by=None, start_date=None, end_date=None,
+                        platforms=None, products=None, top_n=None, order_by='revenue'):
+        """Receita, unidades, custo e nº de vendas agrupados no banco
+
+        group_by: 'day', 'week' (início na segunda), 'month', 'product',
+        'platform' ou None (uma linha com o total). platforms/products=None
+        não filtram; uma lista vazia não seleciona nada. top_n mantém os
+        maiores por `order_by`; séries temporais vêm em ordem cronológica.
+        Retorna um DataFrame tipado com uma linha por grupo.
+        """
+        if group_by is not None and group_by not in self.AGGREGATE_GROUPS:
+            raise ValueError(f"Agrupamento desconhecido: {group_by}")
+        if order_by not in self.AGGREGATE_METRICS:
+            raise ValueError(f"Métrica desconhecida: {order_by}")
+        # Listas viram tuplas ordenadas para servir de chave no cache
+        platforms = tuple(sorted(platforms)) if platforms is not None else None
+        products = tuple(sorted(products)) if products is not None else None
+        return self._aggregate_sales(user_id, group_by, start_date, end_date, platforms, products, top_n, order_by)
+
+    @cached
+    def _aggregate_sales(self, user_id, group_by, start_date, end_date, platforms, products, top_n, order_by):
+        metrics = """
+            SUM(revenue) AS revenue, SUM(units) AS units,
+            SUM(cost) AS cost, SUM(sales_count) AS sales_count
+        """
+        filters = ["user_id = %s"]
+        params = [user_id]
+        if start_date is not None:
+            filters.append("sale_date >= %s")
+            params.append(start_date)
+        if end_date is not None:
+            filters.append("sale_date <= %s")
+            params.append(end_date)
+        for column, values in (("platform", platforms), ("product_name", products)):
+            if values is None:
+                continue
+            if not values:
+                if group_by is None:
+                    # O total continua sendo uma linha, zerada
+                    return build_frame([(0,) * len(self.AGGREGATE_METRICS)],
+                                       list(self.AGGREGATE_METRICS), self.AGGREGATE_DTYPES)
+                columns = [self.AGGREGATE_GROUPS[group_by][1]] + list(self.AGGREGATE_METRICS)
+                return build_frame([], columns, self.AGGREGATE_DTYPES)
+            filters.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+
+        if group_by is None:
+            query = f"SELECT {metrics} FROM {rollups.ROLLUP_TABLE} WHERE {' AND '.join(filters)}"
+        else:
+            expression, alias = self.AGGREGATE_GROUPS[group_by]
+            query = f"""
+                SELECT {expression} AS {alias}, {metrics}
+                FROM {rollups.ROLLUP_TABLE}
+                WHERE {' AND '.join(filters)}
+                GROUP BY {alias}
+            """
+            if top_n is not None:
+                query += f" ORDER BY {order_by} DESC LIMIT %s"
+                params.append(top_n)
+            elif alias == 'period':
+                query += " ORDER BY period"
+            else:
+                query += f" ORDER BY {order_by} DESC"
+
+        frame = self.fetch_frame(query, params, self.AGGREGATE_DTYPES)
+        if group_by in ('day', 'week', 'month') and top_n is not None:
+            frame = frame.sort_values('period', ignore_index=True)
+        if group_by is None:
+            # SUM sem linhas devolve NULL: total zerado
+            frame = frame.fillna(0)
+        return frame
+
+    # Dashboard ao vivo: um retrato dos totais e, depois, só as vendas novas
+    def get_dashboard_snapshot(self, user_id, recent_limit=5, window=timedelta(seconds=30)):
+        """Totais do dashboard e a marca d'água das vendas, lidos num mesmo retrato
+
+        A leitura acontece numa transação com snapshot consistente, então os
+        agregados incluem exatamente as vendas até a marca d'água. `seen` traz
+        os ids criados nos últimos `window` antes dela, para que get_sales_since
+        possa reler essa janela (commits atrasados) sem contar nada duas vezes.
+        """
+        conn = self.db.connect()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            conn.start_transaction(consistent_snapshot=True, readonly=True)
+            cursor.execute("""
+                SELECT COALESCE(SUM(e.amount), 0) AS expenses
+                FROM expenses e
+                JOIN campaigns c ON e.campaign_id = c.id
+                WHERE c.user_id = %s
+            """, (user_id,))
+            expenses = cursor.fetchone()['expenses']
+
+            cursor.execute(f"""
+                SELECT platform, SUM(revenue) AS revenue
+                FROM {rollups.ROLLUP_TABLE}
+                WHERE user_id = %s
+                GROUP BY platform
+            """, (user_id,))
+            by_platform = {row['platform']: row['revenue'] for row in cursor.fetchall()}
+
+            cursor.execute(f"""
+                SELECT sale_date, SUM(revenue) AS revenue
+                FROM {rollups.ROLLUP_TABLE}
+                WHERE user_id = %s
+                GROUP BY sale_date
+            """, (user_id,))
+            by_day = {row['sale_date']: row['revenue'] for row in cursor.fetchall()}
+
+            cursor.execute("""
+                SELECT id, product_name, amount, quantity, sale_date, platform, status, created_at
+                FROM sales
+                WHERE user_id = %s
+                ORDER BY created_at DESC, id DESC
+                LIMIT %s
+            """, (user_id, recent_limit))
+            recent = cursor.fetchall()
+
+            watermark = recent[0]['created_at'] if recent else None
+            seen = {}
+            if watermark is not None:
+                cursor.execute("""
+                    SELECT id, created_at
+                    FROM sales
+                    WHERE user_id = %s AND created_at >= %s
+                """, (user_id, watermark - window))
+                seen = {row['id']: row['created_at'] for row in cursor.fetchall()}
+            conn.commit()
+
+            return {
+                "expenses": expenses,
+                "by_platform": by_platform,
+                "by_day": by_day,
+                "recent": recent,
+                "watermark": watermark,
+                "seen": seen
+            }
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_sales_since(self, user_id, since=None, limit=None):
+        """Vendas criadas a partir de `since` (created_at), em ordem de criação
+
+        Usa o índice (user_id, created_at): o custo depende do número de
+        vendas novas, não do tamanho do histórico. Sem cache, de propósito.
+        """
+        query = """
+            SELECT id, product_name, amount, quantity, sale_date, platform, status, created_at
+            FROM sales
+            WHERE user_id = %s
+        """
+        params = [user_id]
+        if since is not None:
+            query += " AND created_at >= %s"
+            params.append(since)
+        query += " ORDER BY created_at, id"
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(limit)
+        return self.execute_fetch_query(query, params)
+
+    def rebuild_sales_rollup(self, user_id=None, start_date=None, end_date=None):
+        """Recalcula os agregados diários a partir da tabela sales (backfill)"""
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            rows = rollups.rebuild(cursor, user_id, start_date, end_date)
+            self._touch_user(cursor, user_id)
+            conn.commit()
+            if user_id is None:
+                self.cache.clear()
+            else:
+                self.cache.invalidate_user(user_id)
+            return rows
+        except Exception as e:
+            conn.rollback()
+            st.error(f"Erro ao recalcular agregados de vendas: {e}")
+            return None
+        finally:
+            cursor.close()
+            conn.close()
+    
     # Operações de Análise
+    @cached
     def calculate_roi(self, user_id):
         """Calcula ROI básico: (Receita - Despesas) / Despesas * 100"""
         conn = self.db.connect()
@@ -265,10 +847,10 @@ class DBOperations:
             """, (user_id,))
             expenses = cursor.fetchone()[0]
 
-            # Total de vendas
+            # Total de vendas (a partir dos agregados diários)
             cursor.execute("""
-                SELECT COALESCE(SUM(amount * quantity), 0)
-                FROM sales
+                SELECT COALESCE(SUM(revenue), 0)
+                FROM sales_daily_rollup
                 WHERE user_id = %s
             """, (user_id,))
             revenue = cursor.fetchone()[0]
@@ -294,85 +876,120 @@ class DBOperations:
             cursor.close()
             conn.close()
     
+    def _roi(self, revenue, investment):
+        """ROI em %: (Receita - Investimento) / Investimento * 100"""
+        return ((revenue - investment) / investment * 100) if investment > 0 else 0
+
+    def _roi_by_period(self, cursor, user_id):
+        """Receita e investimento mensais, agregados separadamente e depois combinados"""
+        cursor.execute("""
+            SELECT period, SUM(revenue) AS revenue, SUM(investment) AS investment
+            FROM (
+                SELECT DATE_FORMAT(sale_date, '%%Y-%%m') AS period,
+                       SUM(revenue) AS revenue,
+                       0 AS investment
+                FROM sales_daily_rollup
+                WHERE user_id = %s
+                GROUP BY period
+                UNION ALL
+                SELECT DATE_FORMAT(e.date, '%%Y-%%m') AS period,
+                       0 AS revenue,
+                       SUM(e.amount) AS investment
+                FROM expenses e
+                JOIN campaigns c ON c.id = e.campaign_id
+                WHERE c.user_id = %s
+                GROUP BY period
+            ) monthly
+            GROUP BY period
+            ORDER BY period
+        """, (user_id, user_id))
+
+        rows = []
+        for row in cursor.fetchall():
+            revenue = float(row['revenue'])
+            investment = float(row['investment'])
+            rows.append({
+                "period": row['period'],
+                "revenue": revenue,
+                "investment": investment,
+                "roi": self._roi(revenue, investment)
+            })
+        return rows
+
+    def _roi_by_campaign(self, cursor, user_id):
+        """ROI por campanha a partir de despesas e vendas diárias pré-agregadas"""
+        cursor.execute("""
+            SELECT
+                c.id,
+                c.name AS campaign_name,
+                c.platform,
+                c.budget,
+                COALESCE(r.revenue, 0) AS revenue,
+                COALESCE(i.investment, 0) AS investment,
+                c.start_date,
+                IFNULL(c.end_date, CURDATE()) AS end_date
+            FROM campaigns c
+            LEFT JOIN (
+                SELECT e.campaign_id, SUM(e.amount) AS investment
+                FROM expenses e
+                JOIN campaigns ce ON ce.id = e.campaign_id
+                WHERE ce.user_id = %s
+                GROUP BY e.campaign_id
+            ) i ON i.campaign_id = c.id
+            LEFT JOIN (
+                SELECT cr.id AS campaign_id, SUM(d.revenue) AS revenue
+                FROM campaigns cr
+                JOIN (
+                    SELECT platform, sale_date, SUM(revenue) AS revenue
+                    FROM sales_daily_rollup
+                    WHERE user_id = %s
+                    GROUP BY platform, sale_date
+                ) d ON d.platform = cr.platform
+                   AND d.sale_date BETWEEN cr.start_date AND IFNULL(cr.end_date, CURDATE())
+                WHERE cr.user_id = %s
+                GROUP BY cr.id
+            ) r ON r.campaign_id = c.id
+            WHERE c.user_id = %s
+            ORDER BY c.start_date, c.id
+        """, (user_id, user_id, user_id, user_id))
+
+        rows = []
+        for row in cursor.fetchall():
+            revenue = float(row['revenue'])
+            investment = float(row['investment'])
+            rows.append({
+                "id": row['id'],
+                "campaign_name": row['campaign_name'],
+                "platform": row['platform'],
+                "budget": float(row['budget']),
+                "revenue": revenue,
+                "investment": investment,
+                "roi": self._roi(revenue, investment),
+                "start_date": row['start_date'],
+                "end_date": row['end_date']
+            })
+        return rows
+
+    @cached
     def calculate_detailed_roi(self, user_id):
         """Calcula ROI detalhado com dados por período e campanha"""
         conn = self.db.connect()
         cursor = conn.cursor(dictionary=True)
         try:
-            # Dados totais consolidados
-            cursor.execute("""
-                SELECT 
-                    COALESCE(SUM(s.amount * s.quantity), 0) as total_revenue,
-                    COALESCE(SUM(e.amount), 0) as total_investment,
-                    COALESCE(SUM(s.amount * s.quantity) - SUM(e.amount), 0) as total_profit,
-                    CASE 
-                        WHEN COALESCE(SUM(e.amount), 0) > 0 THEN 
-                            (COALESCE(SUM(s.amount * s.quantity), 0) - COALESCE(SUM(e.amount), 0)) / 
-                            COALESCE(SUM(e.amount), 1) * 100
-                        ELSE 0
-                    END as roi
-                FROM sales s
-                LEFT JOIN expenses e ON e.campaign_id IN (
-                    SELECT id FROM campaigns WHERE user_id = %s
-                )
-                WHERE s.user_id = %s
-            """, (user_id, user_id))
-            totals = cursor.fetchone()
+            # Receita e investimento são agregados em consultas separadas
+            # (nunca juntando vendas x despesas linha a linha)
+            roi_by_period = self._roi_by_period(cursor, user_id)
+            campaigns_roi = self._roi_by_campaign(cursor, user_id)
 
-            # ROI por período mensal
-            cursor.execute("""
-                SELECT 
-                    DATE_FORMAT(s.sale_date, '%%Y-%%m') as period,
-                    COALESCE(SUM(s.amount * s.quantity), 0) as revenue,
-                    COALESCE(SUM(e.amount), 0) as investment,
-                    CASE 
-                        WHEN COALESCE(SUM(e.amount), 0) > 0 THEN 
-                            (COALESCE(SUM(s.amount * s.quantity), 0) - COALESCE(SUM(e.amount), 0)) / 
-                            COALESCE(SUM(e.amount), 1) * 100
-                        ELSE 0
-                    END as roi
-                FROM sales s
-                LEFT JOIN expenses e ON e.campaign_id IN (
-                    SELECT id FROM campaigns WHERE user_id = %s
-                ) AND DATE_FORMAT(e.date, '%%Y-%%m') = DATE_FORMAT(s.sale_date, '%%Y-%%m')
-                WHERE s.user_id = %s
-                GROUP BY DATE_FORMAT(s.sale_date, '%%Y-%%m')
-                ORDER BY period
-            """, (user_id, user_id))
-            roi_by_period = cursor.fetchall()
-
-            # ROI por campanha individual
-            cursor.execute("""
-                SELECT 
-                    c.id,
-                    c.name as campaign_name,
-                    c.platform,
-                    c.budget,
-                    COALESCE(SUM(s.amount * s.quantity), 0) as revenue,
-                    COALESCE(SUM(e.amount), 0) as investment,
-                    CASE 
-                        WHEN COALESCE(SUM(e.amount), 0) > 0 THEN 
-                            (COALESCE(SUM(s.amount * s.quantity), 0) - COALESCE(SUM(e.amount), 0)) / 
-                            COALESCE(SUM(e.amount), 1) * 100
-                        ELSE 0
-                    END as roi,
-                    c.start_date,
-                    IFNULL(c.end_date, CURDATE()) as end_date
-                FROM campaigns c
-                LEFT JOIN expenses e ON e.campaign_id = c.id
-                LEFT JOIN sales s ON s.user_id = c.user_id 
-                    AND s.platform = c.platform 
-                    AND s.sale_date BETWEEN c.start_date AND IFNULL(c.end_date, CURDATE())
-                WHERE c.user_id = %s
-                GROUP BY c.id, c.name, c.platform, c.budget, c.start_date, c.end_date
-            """, (user_id,))
-            campaigns_roi = cursor.fetchall()
+            # Totais consolidados a partir dos meses já agregados
+            total_revenue = sum(row['revenue'] for row in roi_by_period)
+            total_investment = sum(row['investment'] for row in roi_by_period)
 
             return {
-                "total_revenue": float(totals['total_revenue']),
-                "total_investment": float(totals['total_investment']),
-                "total_profit": float(totals['total_profit']),
-                "roi": float(totals['roi']),
+                "total_revenue": total_revenue,
+                "total_investment": total_investment,
+                "total_profit": total_revenue - total_investment,
+                "roi": self._roi(total_revenue, total_investment),
                 "roi_by_period": roi_by_period,
                 "campaigns_roi": campaigns_roi
             }
@@ -392,34 +1009,106 @@ class DBOperations:
             cursor.close()
             conn.close()
         
+    def _sales_profit_query(self, user_id, start_date=None, end_date=None, ordered=True):
+        """Monta a consulta de vendas com custo e lucro por venda"""
+        query = """
+            SELECT 
+                s.id,
+                s.product_name,
+                s.amount,
+                s.quantity,
+                s.sale_date,
+                s.platform,
+                s.created_at,
+                s.amount * s.quantity as total_sale,
+                (s.amount * s.quantity) - (IFNULL(p.cost, 0) * s.quantity) as profit,
+                IFNULL(p.cost, 0) as cost
+            FROM sales s
+            LEFT JOIN products p ON p.id = s.product_id
+            WHERE s.user_id = %s
+        """
+        params = [user_id]
+        
+        if start_date and end_date:
+            query += " AND s.sale_date BETWEEN %s AND %s"
+            params.extend([start_date, end_date])
+        
+        if ordered:
+            query += " ORDER BY s.sale_date DESC"
+        return query, params
+
+    # Paginação por chave (keyset): o custo de qualquer página é o mesmo da primeira
+    PAGE_KEYS = {
+        'sale_date': 's.sale_date',
+        'created_at': 's.created_at',
+        'amount': 's.amount',
+        'quantity': 's.quantity',
+        'total_sale': '(s.amount * s.quantity)',
+        'profit': '((s.amount * s.quantity) - (IFNULL(p.cost, 0) * s.quantity))'
+    }
+
+    def get_sales_page(self, user_id, order_by='sale_date', page_size=50, cursor=None,
+                       direction='next', start_date=None, end_date=None, ascending=False):
+        """Obtém uma página de vendas (maiores/mais recentes primeiro) sem OFFSET
+
+        `cursor` é a tupla (valor_da_chave, id) devolvida em next_cursor ou
+        prev_cursor de uma chamada anterior; `direction` indica se a página
+        pedida vem depois ('next') ou antes ('prev') desse cursor.
+        `ascending=True` inverte a ordem da listagem.
+        Retorna {"rows", "next_cursor", "prev_cursor"}.
+        """
+        if order_by not in self.PAGE_KEYS:
+            raise ValueError(f"Ordenação não suportada: {order_by}")
+        if direction not in ('next', 'prev'):
+            raise ValueError(f"Direção inválida: {direction}")
+        key = self.PAGE_KEYS[order_by]
+        backwards = cursor is not None and direction == 'prev'
+        # Ordem efetiva da consulta: voltar uma página lê no sentido contrário
+        descending = ascending == backwards
+
+        query, params = self._sales_profit_query(user_id, start_date, end_date, ordered=False)
+        if cursor is not None:
+            key_value, row_id = cursor
+            op = '<' if descending else '>'
+            query += f" AND ({key} {op} %s OR ({key} = %s AND s.id {op} %s))"
+            params.extend([key_value, key_value, row_id])
+
+        order = 'DESC' if descending else 'ASC'
+        # Uma linha a mais indica se existe outra página na mesma direção
+        query += f" ORDER BY {key} {order}, s.id {order} LIMIT %s"
+        params.append(page_size + 1)
+
+        conn = self.db.connect()
+        db_cursor = conn.cursor(dictionary=True)
+        try:
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
+        finally:
+            db_cursor.close()
+            conn.close()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+        if not rows:
+            return {"rows": [], "next_cursor": None, "prev_cursor": None}
+
+        first = (rows[0][order_by], rows[0]['id'])
+        last = (rows[-1][order_by], rows[-1]['id'])
+        if backwards:
+            next_cursor, prev_cursor = last, first if has_more else None
+        else:
+            next_cursor = last if has_more else None
+            prev_cursor = first if cursor is not None else None
+        return {"rows": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
     def get_sales_profit_data(self, user_id, start_date=None, end_date=None):
         """Obtém dados de vendas e lucros com cálculo do profit"""
         conn = self.db.connect()
         cursor = conn.cursor(dictionary=True)
         try:
-            query = """
-                SELECT 
-                    s.id,
-                    s.product_name,
-                    s.amount,
-                    s.quantity,
-                    s.sale_date,
-                    s.platform,
-                    s.amount * s.quantity as total_sale,
-                    (s.amount * s.quantity) - (IFNULL(p.cost, 0) * s.quantity) as profit,
-                    IFNULL(p.cost, 0) as cost
-                FROM sales s
-                LEFT JOIN products p ON s.product_name = p.name AND s.user_id = p.user_id
-                WHERE s.user_id = %s
-            """
-            params = [user_id]
-            
-            if start_date and end_date:
-                query += " AND s.sale_date BETWEEN %s AND %s"
-                params.extend([start_date, end_date])
-            
-            query += " ORDER BY s.sale_date DESC"
-            
+            query, params = self._sales_profit_query(user_id, start_date, end_date)
             cursor.execute(query, params)
             return cursor.fetchall()
         except Exception as e:
@@ -431,6 +1120,77 @@ class DBOperations:
             cursor.close()
             conn.close()
 
+    # Estado da sincronização incremental com as plataformas
+    def get_sync_state(self, user_id, platform):
+        """Último high-water mark sincronizado com sucesso"""
+        conn = self.db.connect()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                "SELECT * FROM sync_state WHERE user_id = %s AND platform = %s",
+                (user_id, platform)
+            )
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def save_sync_state(self, user_id, platform, high_water_mark=None, status='ok', rows=0):
+        """Grava o resultado de uma sincronização
+
+        Em falhas (status != 'ok') o high-water mark anterior é mantido, para que
+        a próxima execução peça o mesmo intervalo de novo.
+        """
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            if status == 'ok':
+                cursor.execute("""
+                    INSERT INTO sync_state (user_id, platform, high_water_mark, last_status, last_rows)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        high_water_mark = VALUES(high_water_mark),
+                        last_status = VALUES(last_status),
+                        last_rows = VALUES(last_rows)
+                """, (user_id, platform, high_water_mark, status, rows))
+            else:
+                cursor.execute("""
+                    INSERT INTO sync_state (user_id, platform, last_status, last_rows)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        last_status = VALUES(last_status),
+                        last_rows = VALUES(last_rows)
+                """, (user_id, platform, status, rows))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            print(f"Erro ao gravar estado de sincronização: {e}")
+            return False
+        finally:
+            cursor.close()
+            conn.close()
+
+    def fetch_frame(self, query, params=None, dtypes=None):
+        """Executa um SELECT e devolve um DataFrame tipado (sem um dict por linha)
+
+        `dtypes` mapeia coluna -> 'money', 'cents', 'int', 'float', 'datetime'
+        ou 'category' (ver database/frames.py).
+        """
+        conn = self.db.connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params or ())
+            return build_frame(cursor.fetchall(), cursor.column_names, dtypes)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def get_sales_profit_frame(self, user_id, start_date=None, end_date=None):
+        """Versão tipada (DataFrame) de get_sales_profit_data"""
+        query, params = self._sales_profit_query(user_id, start_date, end_date)
+        return self.fetch_frame(query, params, SALES_DTYPES)
+
     def execute_fetch_query(self, query, params=None):
         """Para queries SELECT que retornam dados"""
         conn = self.db.connect()
@@ -449,6 +1209,8 @@ class DBOperations:
         try:
             cursor.execute(query, params or ())
             conn.commit()
+            # Escrita arbitrária: não dá para saber o usuário afetado
+            self.cache.clear()
             return cursor.rowcount
         except Exception as e:
             conn.rollback()
@@ -0,0 +1,141 @@
+"""Agregados diários de vendas (sales_daily_rollup)
+
+Uso para backfill:
+    python -m database.rollups --rebuild [--user ID] [--start AAAA-MM-DD] [--end AAAA-MM-DD]
+"""
+import argparse
+
+ROLLUP_TABLE = "sales_daily_rollup"
+
+# Só vendas aprovadas entram nos agregados (reembolsos e cancelamentos saem)
+COUNTED_STATUS = "approved"
+
+CREATE_ROLLUP_TABLE = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    user_id INT NOT NULL,
+    sale_date DATE NOT NULL,
+    platform VARCHAR(50) NOT NULL,
+    product_name VARCHAR(100) NOT NULL,
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    units INT NOT NULL DEFAULT 0,
+    cost DECIMAL(14, 2) NOT NULL DEFAULT 0.00,
+    sales_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, sale_date, platform, product_name),
+    FOREIGN KEY (user_id) REFERENCES users(id)
+)
+"""
+
+_UPSERT_SALE = f"""
+INSERT INTO {ROLLUP_TABLE}
+    (user_id, sale_date, platform, product_name, revenue, units, cost, sales_count)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE
+    revenue = revenue + VALUES(revenue),
+    units = units + VALUES(units),
+    cost = cost + VALUES(cost),
+    sales_count = sales_count + VALUES(sales_count)
+"""
+
+
+def add_sale(cursor, user_id, sale_date, platform, product_name, amount, quantity, cost=0.0):
+    """Soma uma venda ao agregado do dia (usar na mesma transação do INSERT em sales)"""
+    cursor.execute(_UPSERT_SALE, (
+        user_id, sale_date, platform, product_name,
+        amount * quantity, quantity, cost * quantity, 1
+    ))
+
+
+def add_sales(cursor, user_id, sales):
+    """Soma um lote de vendas (product_name, amount, quantity, cost, sale_date, platform)
+
+    O lote é agregado em memória antes, então o número de upserts é o número
+    de combinações dia/plataforma/produto e não o número de vendas.
+    """
+    totals = {}
+    for product_name, amount, quantity, cost, sale_date, platform in sales:
+        key = (sale_date, platform, product_name)
+        revenue, units, total_cost, count = totals.get(key, (0, 0, 0, 0))
+        totals[key] = (
+            revenue + amount * quantity,
+            units + quantity,
+            total_cost + cost * quantity,
+            count + 1
+        )
+
+    cursor.executemany(_UPSERT_SALE, [
+        (user_id, sale_date, platform, product_name, revenue, units, total_cost, count)
+        for (sale_date, platform, product_name), (revenue, units, total_cost, count) in totals.items()
+    ])
+
+
+def rebuild(cursor, user_id=None, start_date=None, end_date=None, dates=None, status=COUNTED_STATUS):
+    """Recalcula os agregados a partir de sales (todos, por usuário, período e/ou dias)
+
+    `status=None` soma todas as vendas (schemas anteriores à coluna status).
+    """
+    filters = []
+    params = []
+    if user_id is not None:
+        filters.append("user_id = %s")
+        params.append(user_id)
+    if start_date is not None:
+        filters.append("sale_date >= %s")
+        params.append(start_date)
+    if end_date is not None:
+        filters.append("sale_date <= %s")
+        params.append(end_date)
+    if dates is not None:
+        dates = sorted(set(dates))
+        if not dates:
+            return 0
+        filters.append(f"sale_date IN ({', '.join(['%s'] * len(dates))})")
+        params.extend(dates)
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    sales_where = where
+    sales_params = params
+    if status is not None:
+        sales_where = f"{where} AND status = %s" if filters else "WHERE status = %s"
+        sales_params = [*params, status]
+
+    cursor.execute(f"DELETE FROM {ROLLUP_TABLE} {where}", params)
+    cursor.execute(f"""
+        INSERT INTO {ROLLUP_TABLE}
+            (user_id, sale_date, platform, product_name, revenue, units, cost, sales_count)
+        SELECT user_id, sale_date, platform, product_name,
+               SUM(amount * quantity), SUM(quantity), SUM(cost * quantity), COUNT(*)
+        FROM sales
+        {sales_where}
+        GROUP BY user_id, sale_date, platform, product_name
+    """, sales_params)
+    return cursor.rowcount
+
+
+def main(argv=None):
+    from .db import DatabaseManager
+
+    parser = argparse.ArgumentParser(description="Manutenção dos agregados diários de vendas")
+    parser.add_argument("--rebuild", action="store_true", help="recalcula os agregados a partir de sales")
+    parser.add_argument("--user", type=int, help="restringe a um usuário")
+    parser.add_argument("--start", help="data inicial (AAAA-MM-DD)")
+    parser.add_argument("--end", help="data final (AAAA-MM-DD)")
+    args = parser.parse_args(argv)
+
+    if not args.rebuild:
+        parser.print_help()
+        return
+
+    conn = DatabaseManager().connect()
+    if conn is None:
+        raise SystemExit("Não foi possível conectar ao banco de dados")
+    cursor = conn.cursor()
+    try:
+        rows = rebuild(cursor, args.user, args.start, args.end)
+        conn.commit()
+        print(f"{rows} linhas de agregado recalculadas")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 from .eduzz import EduzzIntegration
 from .hotmart import HotmartIntegration
 from .kiwify import KiwifyIntegration
+from .monetizze import MonetizzeIntegration
 
 __all__ = [
     'EduzzIntegration',
     'HotmartIntegration',
-    'KiwifyIntegration'
+    'KiwifyIntegration',
+    'MonetizzeIntegration'
 ]
\ No newline at end of file
@@ -1,18 +1,112 @@
-from typing import Dict, Optional, Any, Union, List
+from typing import Dict, Optional, Any, Union, List, Iterator, Tuple, Callable
 import abc
+import hmac
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime, timedelta
 import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
 from urllib.parse import urlencode
-from datetime import datetime, date
+import pandas as pd
+from .credentials import get_credential_store
+from .http_cache import get_http_cache
+from .normalize import normalize_records, SALES_TIMEZONE
+
+
+class TokenBucket:
+    """Limita chamadas a `rate` por segundo, com rajadas de até `capacity`
+
+    Compartilhado por todas as instâncias da mesma plataforma; um 429 com
+    Retry-After pausa o balde inteiro, não só a thread que o recebeu.
+    """
+    
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Consome uma ficha, esperando se preciso; retorna o tempo esperado"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+    
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+# Pools de conexão por plataforma, compartilhados entre instâncias (keep-alive
+# entre usuários e execuções); novas tentativas ficam a cargo de _request
+_adapters: Dict[str, HTTPAdapter] = {}
+_adapters_lock = threading.Lock()
+
 
 class BasePlatformIntegration(abc.ABC):
+    # Sincronização incremental: janela da primeira carga e sobreposição com a
+    # execução anterior (alterações tardias como reembolsos e aprovações)
+    INITIAL_SYNC_DAYS = 365
+    SYNC_OVERLAP = timedelta(days=1)
+    
+    # Status da plataforma (em maiúsculas) -> status gravado em sales.status
+    STATUS_MAP: Dict[str, str] = {}
+    
+    # Normalização: coluna de sales -> caminho no JSON da plataforma (ou lista
+    # de caminhos alternativos); valores em centavos e fuso de datas sem fuso
+    SALE_FIELDS: Dict[str, Union[str, List[str]]] = {}
+    AMOUNT_IN_CENTS = False
+    SOURCE_TIMEZONE = SALES_TIMEZONE
+    
+    # Transporte: taxa por plataforma (chamadas/s, rajada), timeout e novas tentativas
+    RATE_LIMIT: Tuple[float, int] = (5.0, 10)
+    REQUEST_TIMEOUT = 15
+    MAX_RETRIES = 5
+    BACKOFF_BASE = 0.5
+    BACKOFF_MAX = 30.0
+    RETRY_AFTER_MAX = 120.0
+    RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+    # Renova o token quando faltar menos que isso para expires_at
+    REFRESH_MARGIN = timedelta(minutes=5)
+    # Pool HTTP: hosts mantidos (API + autenticação) e conexões por host,
+    # alinhado ao max_workers padrão do SyncOrchestrator
+    POOL_CONNECTIONS = 4
+    POOL_MAXSIZE = 8
+    
     def __init__(self, user_id: int):
         self.user_id = user_id
         self.logger = logging.getLogger(f"{self.__class__.__name__}")
         self.credentials: Dict[str, Any] = self._load_credentials()
         self.session = requests.Session()
-        self.session.headers.update(self._default_headers())
+        adapter = self._adapter()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._apply_headers()
+        self.transport_stats = {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'throttle_wait': 0.0,
+            'refreshes': 0,
+            'not_modified': 0
+        }
     
     @property
     @abc.abstractmethod
@@ -29,28 +123,268 @@ class BasePlatformIntegration(abc.ABC):
     def _default_headers(self) -> Dict[str, str]:
         return {
             'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
             'Content-Type': 'application/json'
         }
     
+    def _apply_headers(self) -> None:
+        """Reconstrói os cabeçalhos da sessão a partir das credenciais atuais"""
+        self.session.headers.update(self._default_headers())
+    
+    def _headers_stale(self) -> bool:
+        """Indica se os cabeçalhos expiraram sem mudança de credencial"""
+        return False
+    
     def _load_credentials(self) -> Dict[str, Any]:
-        """Implemente conforme seu sistema de armazenamento"""
-        return {}
+        return get_credential_store().get(self.user_id, self.PLATFORM_NAME)
+    
+    def save_credentials(self, **changes: Any) -> None:
+        """Atualiza e persiste credenciais (ex.: chaves informadas pelo usuário)"""
+        self.credentials = get_credential_store().update(self.user_id, self.PLATFORM_NAME, **changes)
+        self._apply_headers()
+    
+    def _token_expiring(self, credentials: Dict[str, Any]) -> bool:
+        expires_at = credentials.get('expires_at')
+        if not expires_at:
+            return False
+        return datetime.fromisoformat(expires_at) - datetime.now() <= self.REFRESH_MARGIN
+    
+    def _refresh_credentials(self, stale_token: Optional[str]) -> bool:
+        """Renova o token uma única vez entre instâncias concorrentes
+        
+        Sob o lock do par usuário/plataforma, relê o store: se outra instância
+        já trocou o token, usa o novo em vez de renovar de novo.
+        """
+        store = get_credential_store()
+        with store.lock(self.user_id, self.PLATFORM_NAME):
+            stored = store.get(self.user_id, self.PLATFORM_NAME)
+            if stored and stored.get('access_token') != stale_token and not self._token_expiring(stored):
+                self.credentials = stored
+                self._apply_headers()
+                return True
+            if not self._refresh_token():
+                return False
+            store.set(self.user_id, self.PLATFORM_NAME, self.credentials)
+            self.transport_stats['refreshes'] += 1
+        self._apply_headers()
+        return True
     
     def _handle_api_error(self, response: requests.Response) -> None:
-        if response.status_code == 401:
-            self.logger.warning("Token expirado, tentando renovar...")
-            if self._refresh_token():
-                raise Exception("Token renovado, tente novamente")
+        if response.status_code >= 400:
+            self.logger.error(f"Erro {response.status_code} em {response.request.method} {response.url}")
         response.raise_for_status()
     
+    def _bucket(self) -> TokenBucket:
+        with _buckets_lock:
+            if self.PLATFORM_NAME not in _buckets:
+                _buckets[self.PLATFORM_NAME] = TokenBucket(*self.RATE_LIMIT)
+            return _buckets[self.PLATFORM_NAME]
+    
+    def _adapter(self) -> HTTPAdapter:
+        with _adapters_lock:
+            if self.PLATFORM_NAME not in _adapters:
+                _adapters[self.PLATFORM_NAME] = HTTPAdapter(
+                    pool_connections=self.POOL_CONNECTIONS,
+                    pool_maxsize=self.POOL_MAXSIZE,
+                    pool_block=False
+                )
+            return _adapters[self.PLATFORM_NAME]
+    
+    def _backoff(self, attempt: int) -> float:
+        """Espera exponencial limitada com jitter completo"""
+        return random.uniform(0, min(self.BACKOFF_MAX, self.BACKOFF_BASE * 2 ** attempt))
+    
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Segundos pedidos no cabeçalho Retry-After (número ou data HTTP)"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = (parsedate_to_datetime(value) - datetime.now().astimezone()).total_seconds()
+            except (TypeError, ValueError):
+                return None
+        return min(max(seconds, 0.0), self.RETRY_AFTER_MAX)
+    
+    def _request(self, method: str, url: str, refresh_on_401: bool = True, **kwargs) -> requests.Response:
+        """Requisição com limite de taxa, novas tentativas e renovação de token
+        
+        429/5xx e falhas de rede são repetidos com backoff (respeitando
+        Retry-After); um 401 renova o token e repete a requisição.
+        """
+        kwargs.setdefault('timeout', self.REQUEST_TIMEOUT)
+        if refresh_on_401 and self._token_expiring(self.credentials):
+            self._refresh_credentials(self.credentials.get('access_token'))
+        bucket = self._bucket()
+        rejected_tokens = []  # tokens que já receberam 401 nesta requisição
+        attempt = 0
+        while True:
+            if self._headers_stale():
+                self._apply_headers()
+            self.transport_stats['throttle_wait'] += bucket.acquire()
+            self.transport_stats['requests'] += 1
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.MAX_RETRIES:
+                    raise
+                delay = self._backoff(attempt)
+                self.logger.warning(f"Falha de rede ({e}); nova tentativa em {delay:.1f}s")
+            else:
+                token = self.credentials.get('access_token')
+                if (response.status_code == 401 and refresh_on_401
+                        and token not in rejected_tokens and len(rejected_tokens) < 2):
+                    # A primeira tentativa pode só adotar o token salvo por outra
+                    # instância; se ele também for recusado, renova de fato
+                    self.logger.warning("Token expirado, renovando e repetindo a requisição...")
+                    rejected_tokens.append(token)
+                    if self._refresh_credentials(token):
+                        continue
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.MAX_RETRIES:
+                    self._handle_api_error(response)
+                    return response
+                retry_after = self._retry_after(response)
+                if response.status_code == 429:
+                    self.transport_stats['throttled'] += 1
+                    if retry_after:
+                        bucket.pause(retry_after)
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                self.logger.warning(f"Resposta {response.status_code}; nova tentativa em {delay:.1f}s")
+            attempt += 1
+            self.transport_stats['retries'] += 1
+            time.sleep(delay)
+    
+    def _cached_get(self, url: str, **kwargs) -> Any:
+        """GET validado pelo cache em disco: um 304 reaproveita o corpo salvo
+        
+        Para endpoints de catálogo, que mudam pouco; a resposta só é guardada
+        quando a plataforma envia ETag ou Last-Modified.
+        """
+        cache = get_http_cache()
+        key = f"{url}?{urlencode(sorted((kwargs.get('params') or {}).items()))}"
+        entry = cache.get(self.user_id, self.PLATFORM_NAME, key)
+        kwargs['headers'] = {**cache.conditional_headers(entry), **(kwargs.get('headers') or {})}
+        response = self._request('GET', url, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            self.transport_stats['not_modified'] += 1
+            return entry['body']
+        body = response.json()
+        etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        if etag or last_modified:
+            cache.set(self.user_id, self.PLATFORM_NAME, key, etag, last_modified, body)
+        return body
+    
     @abc.abstractmethod
     def _refresh_token(self) -> bool:
         pass
     
+    # Paginação: cada plataforma informa como pedir uma página, onde estão os
+    # registros e qual é o estado da próxima página (número, token ou cursor)
+    @abc.abstractmethod
+    def _fetch_sales_page(self, start_date: str, end_date: str, page_state: Any) -> Dict[str, Any]:
+        """Busca uma página de vendas; page_state=None indica a primeira"""
+        pass
+    
+    @abc.abstractmethod
+    def _extract_sales(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Registros de venda contidos na resposta de uma página"""
+        pass
+    
     @abc.abstractmethod
-    def get_sales(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    def _next_page_state(self, payload: Dict[str, Any], page_state: Any) -> Optional[Any]:
+        """Estado da próxima página ou None quando não houver mais"""
         pass
     
+    def _iter_pages(self, fetch_page: Callable[[Any], Dict[str, Any]], label: str) -> Iterator[List[Dict[str, Any]]]:
+        """Percorre um endpoint paginado como as vendas (mesmos _extract_sales e
+        _next_page_state); fetch_page(page_state) busca uma página"""
+        page_state = None
+        pages = 0
+        while True:
+            payload = fetch_page(page_state)
+            items = self._extract_sales(payload)
+            pages += 1
+            if items:
+                yield items
+            next_state = self._next_page_state(payload, page_state)
+            # Página vazia ou estado repetido encerram a leitura (evita laço infinito)
+            if not items or next_state is None or next_state == page_state:
+                break
+            page_state = next_state
+        self.logger.debug(f"{pages} página(s) lidas: {label}")
+    
+    def iter_sales(self, start_date: str, end_date: str) -> Iterator[List[Dict[str, Any]]]:
+        """Percorre todas as páginas de vendas do período, entregando uma página por vez"""
+        return self._iter_pages(
+            lambda page_state: self._fetch_sales_page(start_date, end_date, page_state),
+            f"vendas entre {start_date} e {end_date}"
+        )
+    
+    def get_sales(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Todas as vendas do período (todas as páginas) numa lista só
+
+        Para períodos grandes prefira iter_sales, que não junta as páginas.
+        """
+        return [item for items in self.iter_sales(start_date, end_date) for item in items]
+    
+    def incremental_window(self, high_water_mark: Optional[datetime], now: Optional[datetime] = None,
+                           overlap: Optional[timedelta] = None) -> Tuple[str, str, datetime]:
+        """Intervalo (início, fim, novo high-water mark) a partir da última sincronização"""
+        now = now or datetime.now()
+        overlap = self.SYNC_OVERLAP if overlap is None else overlap
+        if high_water_mark is None:
+            start = now - timedelta(days=self.INITIAL_SYNC_DAYS)
+        else:
+            start = min(high_water_mark - overlap, now)
+        return start.strftime('%Y-%m-%d'), now.strftime('%Y-%m-%d'), now
+    
+    def iter_sales_incremental(self, high_water_mark: Optional[datetime], now: Optional[datetime] = None,
+                               overlap: Optional[timedelta] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Só as vendas posteriores ao high-water mark (menos a sobreposição)"""
+        start_date, end_date, _ = self.incremental_window(high_water_mark, now, overlap)
+        return self.iter_sales(start_date, end_date)
+    
+    # Normalização: registros da API -> linhas de sales para o upsert em lote
+    @classmethod
+    def normalize_sales(cls, records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Página de registros -> DataFrame tipado (ver integrations.normalize)"""
+        return normalize_records(
+            records, cls.PLATFORM_NAME, cls.SALE_FIELDS, cls.STATUS_MAP,
+            cls.AMOUNT_IN_CENTS, cls.SOURCE_TIMEZONE
+        )
+    
+    @classmethod
+    def normalize_status(cls, status: Any) -> str:
+        key = str(status or '').strip().upper()
+        return cls.STATUS_MAP.get(key, key.lower() or 'pending')
+    
+    # Webhooks (postbacks): validação por plataforma e registros no formato de
+    # normalize_sales. O segredo fica em credentials['webhook_token'].
+    @classmethod
+    def verify_webhook(cls, headers: Any, query: Dict[str, str], body: bytes,
+                       payload: Dict[str, Any], credentials: Dict[str, Any]) -> bool:
+        """Indica se o postback veio mesmo da plataforma"""
+        return False
+    
+    @classmethod
+    def webhook_sales(cls, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Registros de venda contidos num postback"""
+        return []
+    
+    @staticmethod
+    def _same_secret(received: Any, expected: Any) -> bool:
+        return bool(received) and bool(expected) and hmac.compare_digest(str(received), str(expected))
+    
+    @staticmethod
+    def _hmac_hex(secret: Any, body: bytes, digestmod: Any) -> str:
+        return hmac.new(str(secret or '').encode(), body, digestmod).hexdigest()
+    
+    def get_status_updates(self) -> List[Tuple[str, str]]:
+        """Pares (external_id, status) de vendas alteradas depois da compra"""
+        return []
+    
     @abc.abstractmethod
     def get_products(self) -> Dict[str, Any]:
         pass
@@ -0,0 +1,179 @@
+"""Armazenamento local e criptografado das credenciais das plataformas
+
+Cada par usuário/plataforma é gravado como um token Fernet num arquivo JSON.
+A chave vem de CREDENTIALS_KEY ou do arquivo CREDENTIALS_KEY_FILE, criado na
+primeira execução; o arquivo de dados fica em CREDENTIALS_PATH.
+"""
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+import json
+import os
+import tempfile
+import threading
+
+from cryptography.fernet import Fernet, InvalidToken
+
+try:
+    import fcntl
+except ImportError:  # Windows: só o lock entre threads do processo
+    fcntl = None
+
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".sistema_mkt")
+
+
+def _temp_private(path: str, data: bytes) -> str:
+    """Arquivo temporário único (modo 0600) no diretório de `path`"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return tmp_path
+
+
+def _write_private(path: str, data: bytes) -> None:
+    """Grava de forma atômica e legível só pelo dono"""
+    tmp_path = _temp_private(path, data)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+@contextmanager
+def _file_lock(path: str) -> Iterator[None]:
+    """Lock exclusivo entre processos (app, sincronização, webhooks) via `path`.lock"""
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # fechar libera o flock
+
+
+def _load_key(key_file: str) -> bytes:
+    if os.getenv("CREDENTIALS_KEY"):
+        return os.getenv("CREDENTIALS_KEY").encode()
+    if not os.path.exists(key_file):
+        # link() não sobrescreve: se dois processos criarem a chave ao mesmo
+        # tempo, ambos ficam com a que chegou primeiro
+        tmp_path = _temp_private(key_file, Fernet.generate_key())
+        try:
+            os.link(tmp_path, key_file)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp_path)
+    with open(key_file, "rb") as f:
+        return f.read().strip()
+
+
+class CredentialStore:
+    """Credenciais por (user_id, plataforma), criptografadas em disco
+
+    Também fornece um lock por par usuário/plataforma, para que renovações
+    de token concorrentes aconteçam uma única vez. As gravações relêem o
+    arquivo sob um lock de arquivo, então processos diferentes não apagam
+    as alterações uns dos outros.
+    """
+
+    def __init__(self, path: Optional[str] = None, key: Optional[bytes] = None):
+        self.path = path or os.getenv("CREDENTIALS_PATH", os.path.join(DEFAULT_DIR, "credentials.json"))
+        key_file = os.getenv("CREDENTIALS_KEY_FILE", os.path.join(DEFAULT_DIR, "credentials.key"))
+        self._fernet = Fernet(key or _load_key(key_file))
+        self._lock = threading.Lock()
+        self._refresh_locks: Dict[str, threading.RLock] = {}
+        self._entries: Dict[str, str] = {}
+        self._mtime = None
+
+    @staticmethod
+    def _key(user_id: int, platform: str) -> str:
+        return f"{user_id}:{platform}"
+
+    def _reload(self) -> None:
+        """Relê o arquivo se outro processo/instância o alterou"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            self._entries, self._mtime = {}, None
+            return
+        if mtime != self._mtime:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+            self._mtime = mtime
+
+    def _flush(self) -> None:
+        _write_private(self.path, json.dumps(self._entries).encode("utf-8"))
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    @contextmanager
+    def _writing(self) -> Iterator[None]:
+        """Leitura-alteração-gravação exclusiva entre threads e processos"""
+        with self._lock, _file_lock(self.path):
+            self._reload()
+            yield
+
+    def _decrypt(self, platform: str, token: Optional[str]) -> Dict[str, Any]:
+        if token is None:
+            return {}
+        try:
+            return json.loads(self._fernet.decrypt(token.encode()))
+        except InvalidToken:
+            raise ValueError(f"Credenciais de {platform} ilegíveis: chave de criptografia diferente")
+
+    def _encrypt(self, credentials: Dict[str, Any]) -> str:
+        return self._fernet.encrypt(json.dumps(credentials).encode()).decode()
+
+    def get(self, user_id: int, platform: str) -> Dict[str, Any]:
+        with self._lock:
+            self._reload()
+            token = self._entries.get(self._key(user_id, platform))
+        return self._decrypt(platform, token)
+
+    def set(self, user_id: int, platform: str, credentials: Dict[str, Any]) -> None:
+        token = self._encrypt(credentials)
+        with self._writing():
+            self._entries[self._key(user_id, platform)] = token
+            self._flush()
+
+    def update(self, user_id: int, platform: str, **changes: Any) -> Dict[str, Any]:
+        key = self._key(user_id, platform)
+        with self.lock(user_id, platform), self._writing():
+            credentials = self._decrypt(platform, self._entries.get(key))
+            credentials.update(changes)
+            self._entries[key] = self._encrypt(credentials)
+            self._flush()
+        return credentials
+
+    def delete(self, user_id: int, platform: str) -> None:
+        with self._writing():
+            if self._entries.pop(self._key(user_id, platform), None) is not None:
+                self._flush()
+
+    def lock(self, user_id: int, platform: str) -> threading.RLock:
+        with self._lock:
+            return self._refresh_locks.setdefault(self._key(user_id, platform), threading.RLock())
+
+
+_store: Optional[CredentialStore] = None
+_store_lock = threading.Lock()
+
+
+def get_credential_store() -> CredentialStore:
+    """Store compartilhado pelo processo (criado no primeiro uso)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CredentialStore()
+        return _store
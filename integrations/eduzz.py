@@ -1,11 +1,30 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from .base import BasePlatformIntegration
+import hashlib
 import json
 from datetime import datetime, date, timedelta
 
 class EduzzIntegration(BasePlatformIntegration):
     PLATFORM_NAME = 'Eduzz'
     BASE_URL = 'https://api.eduzz.com/'
+    PAGE_SIZE = 100
+    STATUS_MAP = {
+        'PAGA': 'approved',
+        'ABERTA': 'pending',
+        'EM RECUPERAÇÃO': 'pending',
+        'AGUARDANDO REEMBOLSO': 'refunded',
+        'REEMBOLSADO': 'refunded',
+        'CANCELADA': 'cancelled',
+        'EXPIRADA': 'cancelled',
+        'DUPLICADA': 'cancelled',
+    }
+    SALE_FIELDS = {
+        'external_id': 'sale_id',
+        'product_name': 'content_title',
+        'amount': 'sale_amount_win',
+        'sale_date': ['date_payment', 'date_create'],
+        'status': 'sale_status_name',
+    }
     
     def __init__(self, user_id: int):
         super().__init__(user_id)
@@ -23,8 +42,7 @@ class EduzzIntegration(BasePlatformIntegration):
             'client_id': self.credentials['api_key'],
             'client_secret': self.credentials['api_secret']
         }
-        response = self.session.post(self.token_url, data=payload)
-        self._handle_api_error(response)
+        response = self._request('POST', self.token_url, data=payload, refresh_on_401=False)
         token_data = response.json()
         self.credentials.update({
             'access_token': token_data['access_token'],
@@ -33,18 +51,48 @@ class EduzzIntegration(BasePlatformIntegration):
         })
         return True
     
-    def get_sales(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    def _fetch_sales_page(self, start_date: str, end_date: str, page_state: Any) -> Dict[str, Any]:
         params = {
             'start_date': start_date,
             'end_date': end_date,
-            'page': 1,
-            'per_page': 100
+            'page': page_state or 1,
+            'per_page': self.PAGE_SIZE
         }
-        response = self.session.get(f"{self.BASE_URL}v1/sales", params=params)
-        self._handle_api_error(response)
+        response = self._request('GET', f"{self.BASE_URL}v1/sales", params=params)
         return response.json()
     
+    def _extract_sales(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return payload.get('data') or []
+    
+    def _next_page_state(self, payload: Dict[str, Any], page_state: Any) -> Optional[int]:
+        """Paginação por número de página (paginator.totalPages)"""
+        page = page_state or 1
+        total_pages = (payload.get('paginator') or {}).get('totalPages')
+        if total_pages is not None:
+            return page + 1 if page < int(total_pages) else None
+        # Sem paginator: página cheia indica que pode haver mais
+        return page + 1 if len(self._extract_sales(payload)) >= self.PAGE_SIZE else None
+    
+    @classmethod
+    def verify_webhook(cls, headers: Any, query: Dict[str, str], body: bytes,
+                       payload: Dict[str, Any], credentials: Dict[str, Any]) -> bool:
+        """HMAC-SHA256 do corpo no cabeçalho X-Signature"""
+        secret = credentials.get('webhook_token')
+        return cls._same_secret(headers.get('X-Signature'), secret and cls._hmac_hex(secret, body, hashlib.sha256))
+    
+    @classmethod
+    def webhook_sales(cls, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Postback com os campos trans_* da fatura
+        if not payload.get('trans_cod'):
+            return []
+        return [{
+            'sale_id': payload['trans_cod'],
+            'content_title': payload.get('product_name'),
+            'sale_amount_win': payload.get('trans_value'),
+            'date_payment': payload.get('trans_paiddate'),
+            'date_create': payload.get('trans_createdate'),
+            'sale_status_name': payload.get('trans_status_name')
+        }]
+    
     def get_products(self) -> Dict[str, Any]:
-        response = self.session.get(f"{self.BASE_URL}v1/products")
-        self._handle_api_error(response)
-        return response.json()
\ No newline at end of file
+        return self._cached_get(f"{self.BASE_URL}v1/products")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BasePlatformIntegration
 import base64
 from datetime import datetime, timedelta
@@ -7,6 +7,29 @@ class HotmartIntegration(BasePlatformIntegration):
     PLATFORM_NAME = 'Hotmart'
     BASE_URL = 'https://api-developers.hotmart.com/v1/'
     AUTH_URL = 'https://api-sec-vlc.hotmart.com/security/oauth/token'
+    PAGE_SIZE = 500
+    RATE_LIMIT = (10.0, 20)
+    STATUS_MAP = {
+        'APPROVED': 'approved',
+        'COMPLETE': 'approved',
+        'WAITING_PAYMENT': 'pending',
+        'BILLET_PRINTED': 'pending',
+        'DISPUTE': 'pending',
+        'REFUNDED': 'refunded',
+        'PROTESTED': 'refunded',
+        'CANCELLED': 'cancelled',
+        'EXPIRED': 'cancelled',
+        'CHARGEBACK': 'chargeback',
+    }
+    # Status consultados em get_purchases para corrigir vendas já importadas
+    UPDATE_STATUSES = ('REFUNDED', 'CANCELLED', 'CHARGEBACK')
+    SALE_FIELDS = {
+        'external_id': 'purchase.transaction',
+        'product_name': 'product.name',
+        'amount': 'purchase.price.value',
+        'sale_date': ['purchase.approved_date', 'purchase.order_date'],
+        'status': 'purchase.status',
+    }
     
     def _default_headers(self) -> Dict[str, str]:
         headers = super()._default_headers()
@@ -31,16 +54,16 @@ class HotmartIntegration(BasePlatformIntegration):
             'refresh_token': self.credentials['refresh_token']
         }
         
-        # Usando self.session em vez de requests direto
-        response = self.session.post(
+        # Sem renovação automática: um 401 aqui significa refresh_token inválido
+        response = self._request(
+            'POST',
             self.AUTH_URL,
             headers=headers,
             data=payload,
-            timeout=30
+            timeout=30,
+            refresh_on_401=False
         )
         
-        self._handle_api_error(response)
-        
         token_data = response.json()
         self.credentials.update({
             'access_token': token_data['access_token'],
@@ -49,37 +72,67 @@ class HotmartIntegration(BasePlatformIntegration):
         })
         return True
     
-    def get_sales(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    def _fetch_sales_page(self, start_date: str, end_date: str, page_state: Any) -> Dict[str, Any]:
         params = {
             'start_date': start_date,
             'end_date': end_date,
-            'max_results': 1000
+            'max_results': self.PAGE_SIZE
         }
-        response = self.session.get(
+        if page_state:
+            params['page_token'] = page_state
+        response = self._request(
+            'GET',
             f"{self.BASE_URL}sales/history",
-            params=params,
-            timeout=15
+            params=params
         )
-        self._handle_api_error(response)
         return response.json()
     
+    def _extract_sales(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return payload.get('items') or []
+    
+    def _next_page_state(self, payload: Dict[str, Any], page_state: Any) -> Optional[str]:
+        """Paginação por token (page_info.next_page_token)"""
+        return (payload.get('page_info') or {}).get('next_page_token') or None
+    
+    @classmethod
+    def verify_webhook(cls, headers: Any, query: Dict[str, str], body: bytes,
+                       payload: Dict[str, Any], credentials: Dict[str, Any]) -> bool:
+        """Hottok enviado no cabeçalho X-Hotmart-Hottok (ou no corpo, na versão 1)"""
+        received = headers.get('X-Hotmart-Hottok') or payload.get('hottok')
+        return cls._same_secret(received, credentials.get('webhook_token'))
+    
+    @classmethod
+    def webhook_sales(cls, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # Eventos de compra trazem product/purchase como em sales/history
+        data = payload.get('data') or {}
+        return [data] if data.get('purchase') else []
+    
+    def get_status_updates(self) -> List[Tuple[str, str]]:
+        records = []
+        for transaction_status in self.UPDATE_STATUSES:
+            pages = self._iter_pages(
+                lambda page_token, status=transaction_status: self.get_purchases(status, page_token),
+                f"compras {transaction_status}"
+            )
+            for items in pages:
+                records.extend(items)
+        sales = self.normalize_sales(records).dropna(subset=['external_id'])
+        return list(zip(sales['external_id'], sales['status']))
+    
     def get_products(self) -> Dict[str, Any]:
-        response = self.session.get(
-            f"{self.BASE_URL}products",
-            timeout=15
-        )
-        self._handle_api_error(response)
-        return response.json()
+        return self._cached_get(f"{self.BASE_URL}products")
 
-    def get_purchases(self, transaction_status: str = 'APPROVED') -> Dict[str, Any]:
-        """Método específico da Hotmart para obter compras"""
+    def get_purchases(self, transaction_status: str = 'APPROVED', page_token: Optional[str] = None) -> Dict[str, Any]:
+        """Método específico da Hotmart para obter compras (uma página)"""
         params = {
-            'transaction_status': transaction_status
+            'transaction_status': transaction_status,
+            'max_results': self.PAGE_SIZE
         }
-        response = self.session.get(
+        if page_token:
+            params['page_token'] = page_token
+        response = self._request(
+            'GET',
             f"{self.BASE_URL}purchases",
-            params=params,
-            timeout=15
+            params=params
         )
-        self._handle_api_error(response)
         return response.json()
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""Cache HTTP em disco para endpoints de catálogo (validação por ETag/Last-Modified)
+
+Cada resposta 200 que traz ETag ou Last-Modified é gravada com seus
+validadores; na próxima chamada a requisição vai com If-None-Match /
+If-Modified-Since e um 304 devolve o corpo salvo sem baixar o catálogo de
+novo. As entradas são separadas por usuário e plataforma, uma por arquivo,
+em HTTP_CACHE_DIR (padrão ~/.sistema_mkt/http_cache).
+"""
+from typing import Dict, Any, Optional
+import hashlib
+import json
+import os
+import threading
+
+from .credentials import DEFAULT_DIR, _write_private
+
+
+class HttpCache:
+    """Respostas validáveis por (user_id, plataforma, URL)"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("HTTP_CACHE_DIR", os.path.join(DEFAULT_DIR, "http_cache"))
+        self._lock = threading.Lock()
+
+    def _path(self, user_id: int, platform: str, url: str) -> str:
+        digest = hashlib.sha256(f"{user_id}:{platform}:{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def get(self, user_id: int, platform: str, url: str) -> Optional[Dict[str, Any]]:
+        """Entrada salva ({etag, last_modified, body}) ou None"""
+        path = self._path(user_id, platform, url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def set(self, user_id: int, platform: str, url: str, etag: Optional[str],
+            last_modified: Optional[str], body: Any) -> None:
+        entry = {"etag": etag, "last_modified": last_modified, "body": body}
+        with self._lock:
+            _write_private(self._path(user_id, platform, url), json.dumps(entry).encode("utf-8"))
+
+    def delete(self, user_id: int, platform: str, url: str) -> None:
+        try:
+            os.remove(self._path(user_id, platform, url))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        """Cabeçalhos de validação para uma entrada salva"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+_cache: Optional[HttpCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_http_cache() -> HttpCache:
+    """Cache compartilhado pelo processo (criado no primeiro uso)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
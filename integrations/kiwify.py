@@ -1,28 +1,78 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import hashlib
 from .base import BasePlatformIntegration
 
 class KiwifyIntegration(BasePlatformIntegration):
     PLATFORM_NAME = 'Kiwify'
     BASE_URL = 'https://api.kiwify.com.br/v1/'
+    PAGE_SIZE = 100
+    STATUS_MAP = {
+        'PAID': 'approved',
+        'WAITING_PAYMENT': 'pending',
+        'REFUNDED': 'refunded',
+        'REFUSED': 'cancelled',
+        'CHARGEDBACK': 'chargeback',
+    }
+    SALE_FIELDS = {
+        'external_id': 'id',
+        'product_name': 'product.name',
+        'amount': 'net_amount',
+        'sale_date': ['approved_date', 'created_at'],
+        'status': 'order_status',
+    }
+    AMOUNT_IN_CENTS = True
     
     def _default_headers(self) -> Dict[str, str]:
         headers = super()._default_headers()
-        headers['Authorization'] = f'Bearer {self.credentials["api_key"]}'
+        headers['Authorization'] = f'Bearer {self.credentials.get("api_key", "")}'
         return headers
     
     def _refresh_token(self) -> bool:
         return True  # Kiwify não usa OAuth2
     
-    def get_sales(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    def _fetch_sales_page(self, start_date: str, end_date: str, page_state: Any) -> Dict[str, Any]:
         params = {
             'filter[start_date]': start_date,
-            'filter[end_date]': end_date
+            'filter[end_date]': end_date,
+            'page_number': page_state or 1,
+            'page_size': self.PAGE_SIZE
         }
-        response = self.session.get(f"{self.BASE_URL}orders", params=params)
-        self._handle_api_error(response)
+        response = self._request('GET', f"{self.BASE_URL}orders", params=params)
         return response.json()
     
+    def _extract_sales(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return payload.get('data') or []
+    
+    def _next_page_state(self, payload: Dict[str, Any], page_state: Any) -> Optional[int]:
+        """Paginação por número de página (pagination.count = total de registros)"""
+        page = page_state or 1
+        pagination = payload.get('pagination') or {}
+        count = pagination.get('count')
+        if count is not None:
+            page_size = int(pagination.get('page_size') or self.PAGE_SIZE)
+            return page + 1 if page * page_size < int(count) else None
+        return page + 1 if len(self._extract_sales(payload)) >= self.PAGE_SIZE else None
+    
+    @classmethod
+    def verify_webhook(cls, headers: Any, query: Dict[str, str], body: bytes,
+                       payload: Dict[str, Any], credentials: Dict[str, Any]) -> bool:
+        """HMAC-SHA1 do corpo com o token do webhook, em ?signature="""
+        secret = credentials.get('webhook_token')
+        return cls._same_secret(query.get('signature'), secret and cls._hmac_hex(secret, body, hashlib.sha1))
+    
+    @classmethod
+    def webhook_sales(cls, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # O postback usa nomes diferentes da API de pedidos
+        if not payload.get('order_id'):
+            return []
+        return [{
+            'id': payload['order_id'],
+            'order_status': payload.get('order_status'),
+            'product': {'name': (payload.get('Product') or {}).get('product_name')},
+            'net_amount': (payload.get('Commissions') or {}).get('my_commission'),
+            'approved_date': payload.get('approved_date'),
+            'created_at': payload.get('created_at')
+        }]
+    
     def get_products(self) -> Dict[str, Any]:
-        response = self.session.get(f"{self.BASE_URL}products")
-        self._handle_api_error(response)
-        return response.json()
\ No newline at end of file
+        return self._cached_get(f"{self.BASE_URL}products")
\ No newline at end of file
@@ -1,45 +1,96 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from .base import BasePlatformIntegration
 import hashlib
-from datetime import datetime, date, timedelta
+from datetime import date
 
 class MonetizzeIntegration(BasePlatformIntegration):
     PLATFORM_NAME = 'Monetizze'
     BASE_URL = 'https://api.monetizze.com.br/2.1/'
+    PAGE_SIZE = 100
+    RATE_LIMIT = (2.0, 4)
+    STATUS_MAP = {
+        'FINALIZADA': 'approved',
+        'COMPLETA': 'approved',
+        'AGUARDANDO PAGAMENTO': 'pending',
+        'BLOQUEADA': 'pending',
+        'CANCELADA': 'cancelled',
+        'DEVOLVIDA': 'refunded',
+    }
+    SALE_FIELDS = {
+        'external_id': 'venda.codigo',
+        'product_name': 'produto.nome',
+        'amount': 'venda.valor',
+        'sale_date': ['venda.dataFinalizada', 'venda.dataInicio'],
+        'status': 'venda.status',
+    }
     
     def _default_headers(self) -> Dict[str, str]:
         headers = super()._default_headers()
         headers['Authorization'] = self._generate_auth_header()
         return headers
     
+    def _headers_stale(self) -> bool:
+        # O hash inclui a data: o cabeçalho vence à meia-noite
+        return getattr(self, '_auth_date', None) != date.today()
+    
     def _generate_auth_header(self) -> str:
         """Monetizze usa hash MD5 de email+token+data"""
-        email = self.credentials['email']
-        token = self.credentials['api_token']
-        current_date = datetime.now().strftime('%Y-%m-%d')
+        email = self.credentials.get('email', '')
+        token = self.credentials.get('api_token', '')
+        self._auth_date = date.today()
+        current_date = self._auth_date.strftime('%Y-%m-%d')
         hash_str = f"{email}{token}{current_date}"
         hash_md5 = hashlib.md5(hash_str.encode()).hexdigest()
         return f"BASIC {email}:{hash_md5}"
     
     def _refresh_token(self) -> bool:
-        return True  # Monetizze não usa OAuth2
+        return True  # Monetizze não usa OAuth2; o cabeçalho é refeito em _apply_headers
     
-    def get_sales(self, start_date: str, end_date: str) -> Dict[str, Any]:
+    def _fetch_sales_page(self, start_date: str, end_date: str, page_state: Any) -> Dict[str, Any]:
         params = {
             'dataInicio': start_date,
-            'dataFim': end_date
+            'dataFim': end_date,
+            'pagina': page_state or 1
         }
-        response = self.session.get(f"{self.BASE_URL}transacoes", params=params)
-        self._handle_api_error(response)
+        response = self._request('GET', f"{self.BASE_URL}transacoes", params=params)
         return response.json()
     
+    def _extract_sales(self, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return payload.get('dados') or []
+    
+    def _next_page_state(self, payload: Dict[str, Any], page_state: Any) -> Optional[int]:
+        """Paginação por número de página (campo paginas = total de páginas)"""
+        page = page_state or 1
+        total_pages = payload.get('paginas')
+        if total_pages is not None:
+            return page + 1 if page < int(total_pages) else None
+        return page + 1 if len(self._extract_sales(payload)) >= self.PAGE_SIZE else None
+    
+    @classmethod
+    def verify_webhook(cls, headers: Any, query: Dict[str, str], body: bytes,
+                       payload: Dict[str, Any], credentials: Dict[str, Any]) -> bool:
+        """Chave única da conta enviada no próprio postback"""
+        return cls._same_secret(payload.get('chave_unica'), credentials.get('webhook_token'))
+    
+    @classmethod
+    def webhook_sales(cls, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+        # O postback tem venda/produto no mesmo formato de transacoes
+        return [payload] if (payload.get('venda') or {}).get('codigo') else []
+    
+    def get_status_updates(self) -> List[Tuple[str, str]]:
+        """Status atual das vendas ligadas às assinaturas (cancelamentos, devoluções)"""
+        updates = []
+        for records in self._iter_pages(self.get_subscriptions, "assinaturas"):
+            for record in records:
+                sale = record.get('venda') or {}
+                if sale.get('codigo') and sale.get('status'):
+                    updates.append((str(sale['codigo']), self.normalize_status(sale['status'])))
+        return updates
+    
     def get_products(self) -> Dict[str, Any]:
-        response = self.session.get(f"{self.BASE_URL}produtos")
-        self._handle_api_error(response)
-        return response.json()
+        return self._cached_get(f"{self.BASE_URL}produtos")
     
-    def get_subscriptions(self) -> Dict[str, Any]:
-        """Método específico da Monetizze para assinaturas"""
-        response = self.session.get(f"{self.BASE_URL}assinaturas")
-        self._handle_api_error(response)
+    def get_subscriptions(self, page: Optional[int] = None) -> Dict[str, Any]:
+        """Método específico da Monetizze para assinaturas (uma página)"""
+        response = self._request('GET', f"{self.BASE_URL}assinaturas", params={'pagina': page or 1})
         return response.json()
\ No newline at end of file
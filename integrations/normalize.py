@@ -0,0 +1,140 @@
+"""Normalização vetorizada de páginas de vendas das plataformas
+
+Cada integração declara em SALE_FIELDS onde ficam os campos no JSON da
+plataforma; uma página inteira vira um DataFrame tipado com as colunas de
+sales, pronto para DBOperations.create_sales_bulk:
+
+    product_name  categórico
+    amount_cents  Int64 (centavos)
+    quantity      Int64
+    sale_date     datetime64 (dia no fuso SALES_TIMEZONE)
+    platform      categórico
+    external_id   string
+    status        string (status canônico, ver STATUS_MAP)
+"""
+from typing import Dict, Any, List, Union, Sequence
+
+import pandas as pd
+
+# Fuso único das datas de venda gravadas
+SALES_TIMEZONE = "America/Sao_Paulo"
+
+SALE_COLUMNS = ['product_name', 'amount_cents', 'quantity', 'sale_date', 'platform', 'external_id', 'status']
+
+# Sufixo de fuso em textos ISO (Z, +00:00, -0300)
+_TZ_SUFFIX = r'(?:Z|[+-]\d{2}:?\d{2})$'
+
+FieldPaths = Union[str, Sequence[str]]
+
+
+def _extract(records: List[Dict[str, Any]], paths: List[str]) -> pd.DataFrame:
+    """Só os caminhos pedidos (a.b.c), nível a nível
+
+    Cada nível é lido por DataFrame.from_records, em vez de achatar o registro
+    inteiro com json_normalize (que percorre todos os campos em Python).
+    """
+    tree: Dict[str, List[str]] = {}
+    for path in paths:
+        head, _, rest = path.partition('.')
+        tree.setdefault(head, []).append(rest)
+    frame = pd.DataFrame.from_records(records, columns=list(tree))
+    columns = {}
+    for head, rests in tree.items():
+        leaves = [rest for rest in rests if rest]
+        if len(leaves) < len(rests):
+            columns[head] = frame[head].to_numpy()
+        if leaves:
+            nested = [value if isinstance(value, dict) else {} for value in frame[head]]
+            sub = _extract(nested, leaves)
+            for leaf in leaves:
+                columns[f"{head}.{leaf}"] = sub[leaf].to_numpy()
+    return pd.DataFrame(columns, index=frame.index)
+
+
+def _column(frame: pd.DataFrame, paths: FieldPaths) -> pd.Series:
+    """Primeiro caminho preenchido entre os informados (campos alternativos)"""
+    if isinstance(paths, str):
+        if paths in frame:
+            return frame[paths]
+        paths = [paths]
+    present = [frame[path] for path in paths if path in frame and frame[path].notna().any()]
+    if not present:
+        return pd.Series(pd.NA, index=frame.index, dtype=object)
+    result = present[0]
+    for values in present[1:]:
+        result = result.where(result.notna() & (result != ''), values)
+    return result
+
+
+def _to_sale_date(values: pd.Series, source_tz: str) -> pd.Series:
+    """Timestamps em ms (UTC) ou textos ISO -> dia no fuso SALES_TIMEZONE
+
+    Textos sem fuso são interpretados no fuso de origem da plataforma.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return _localize(pd.to_datetime(values, unit='ms', utc=True))
+    if pd.api.types.is_string_dtype(values) and not pd.api.types.is_object_dtype(values):
+        numeric = pd.Series(float('nan'), index=values.index)
+    else:
+        numeric = pd.to_numeric(values, errors='coerce')  # colunas mistas
+    result = pd.to_datetime(numeric, unit='ms', utc=True)
+
+    text = values.where(numeric.isna() & values.notna()).astype('string')
+    has_tz = text.str.contains(_TZ_SUFFIX, regex=True, na=False)
+    aware = pd.to_datetime(text.where(has_tz), format='ISO8601', utc=True, errors='coerce')
+    naive = pd.to_datetime(text.where(~has_tz), format='ISO8601', errors='coerce')
+    naive = naive.dt.tz_localize(source_tz, ambiguous='NaT', nonexistent='shift_forward').dt.tz_convert('UTC')
+
+    return _localize(result.fillna(aware).fillna(naive))
+
+
+def _localize(moments: pd.Series) -> pd.Series:
+    return moments.dt.tz_convert(SALES_TIMEZONE).dt.tz_localize(None).dt.normalize()
+
+
+def _to_float(values: pd.Series) -> pd.Series:
+    try:
+        # Cast direto é bem mais rápido que to_numeric em colunas de texto
+        return values.astype('float64')
+    except (TypeError, ValueError):
+        return pd.to_numeric(values, errors='coerce')
+
+
+def _to_cents(values: pd.Series, in_cents: bool) -> pd.Series:
+    amounts = _to_float(values)
+    if not in_cents:
+        amounts = amounts * 100
+    return amounts.round().astype('Int64')
+
+
+def _to_id(values: pd.Series) -> pd.Series:
+    # Códigos numéricos com lacunas chegam como float (123.0)
+    if pd.api.types.is_float_dtype(values):
+        values = values.astype('Int64')
+    return values.astype('string')
+
+
+def _to_status(values: pd.Series, status_map: Dict[str, str]) -> pd.Series:
+    keys = values.astype('string').str.strip().str.upper()
+    return keys.map(status_map).fillna(keys.str.lower()).fillna('pending').astype('string')
+
+
+def normalize_records(records: List[Dict[str, Any]], platform: str, fields: Dict[str, FieldPaths],
+                      status_map: Dict[str, str], amount_in_cents: bool = False,
+                      source_tz: str = SALES_TIMEZONE) -> pd.DataFrame:
+    """Converte registros de uma plataforma no DataFrame tipado de vendas"""
+    if not records:
+        return pd.DataFrame({column: pd.Series(dtype=object) for column in SALE_COLUMNS})
+
+    paths = [path for value in fields.values() for path in ([value] if isinstance(value, str) else value)]
+    raw = _extract(records, paths)
+    quantity = _column(raw, fields['quantity']) if 'quantity' in fields else pd.Series(1, index=raw.index)
+    return pd.DataFrame({
+        'product_name': _column(raw, fields['product_name']).astype('category'),
+        'amount_cents': _to_cents(_column(raw, fields['amount']), amount_in_cents),
+        'quantity': _to_float(quantity).fillna(1).astype('Int64'),
+        'sale_date': _to_sale_date(_column(raw, fields['sale_date']), source_tz),
+        'platform': pd.Categorical([platform] * len(raw)),
+        'external_id': _to_id(_column(raw, fields['external_id'])),
+        'status': _to_status(_column(raw, fields['status']), status_map),
+    }, columns=SALE_COLUMNS)
@@ -0,0 +1,256 @@
+from typing import Dict, Optional, Any, List, Callable, Iterable, Tuple
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .eduzz import EduzzIntegration
+from .hotmart import HotmartIntegration
+from .kiwify import KiwifyIntegration
+from .monetizze import MonetizzeIntegration
+from .base import BasePlatformIntegration
+
+PLATFORMS = {
+    'Hotmart': HotmartIntegration,
+    'Eduzz': EduzzIntegration,
+    'Kiwify': KiwifyIntegration,
+    'Monetizze': MonetizzeIntegration,
+}
+
+# Chamadas simultâneas por plataforma (somando todos os usuários)
+DEFAULT_PLATFORM_LIMITS = {
+    'Hotmart': 4,
+    'Eduzz': 4,
+    'Kiwify': 4,
+    'Monetizze': 2,
+}
+
+# (user_id, plataforma, registros da página) -> linhas gravadas
+PageHandler = Callable[[int, str, List[Dict[str, Any]]], int]
+# (user_id, plataforma, [(external_id, status)]) -> vendas atualizadas
+StatusHandler = Callable[[int, str, List[Tuple[str, str]]], int]
+IntegrationFactory = Callable[[str, int], BasePlatformIntegration]
+
+
+def default_integration_factory(platform: str, user_id: int) -> BasePlatformIntegration:
+    return PLATFORMS[platform](user_id)
+
+
+class PageWriteError(Exception):
+    """Parte da página não foi gravada; o high-water mark não pode avançar"""
+
+
+def database_page_handler(operations: Any) -> PageHandler:
+    """Grava cada página em sales por upsert (platform, external_id) via DBOperations
+
+    Linhas recusadas ou blocos desfeitos levantam PageWriteError: a plataforma
+    fica com status 'error' e a próxima execução relê a mesma janela.
+    """
+    def handle(user_id: int, platform: str, items: List[Dict[str, Any]]) -> int:
+        report = operations.create_sales_bulk(user_id, PLATFORMS[platform].normalize_sales(items))
+        if report['failed']:
+            details = "; ".join(report['errors'][:3])
+            raise PageWriteError(f"{report['failed']} venda(s) não gravada(s): {details}")
+        return report['inserted'] + report['updated']
+    return handle
+
+
+def database_status_handler(operations: Any) -> StatusHandler:
+    """Aplica reembolsos/cancelamentos às vendas já importadas via DBOperations"""
+    def handle(user_id: int, platform: str, updates: List[Tuple[str, str]]) -> int:
+        return operations.update_sales_status(user_id, platform, updates)['updated']
+    return handle
+
+
+class SyncOrchestrator:
+    """Sincroniza várias plataformas (e usuários) em paralelo num pool de threads
+
+    O tempo total passa a ser o da plataforma mais lenta, e não a soma de todas.
+    Cada plataforma tem um limite próprio de chamadas simultâneas (no máximo
+    `max_workers`) e threads próprias, então uma plataforma lenta ou com muitas
+    tarefas não atrasa as outras. Toda a execução respeita um prazo: páginas
+    não são mais pedidas depois dele.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 8,
+        platform_limits: Optional[Dict[str, int]] = None,
+        deadline: Optional[float] = None,
+        page_handler: Optional[PageHandler] = None,
+        integration_factory: IntegrationFactory = default_integration_factory,
+        state_store: Optional[Any] = None,
+        status_handler: Optional[StatusHandler] = None
+    ):
+        """`state_store` (ex.: DBOperations) habilita o modo incremental: cada
+        plataforma pede apenas o que veio depois do último high-water mark.
+        O modo incremental exige `page_handler`: o mark avança e as vendas da
+        janela não são pedidas de novo."""
+        self.max_workers = max_workers
+        self.state_store = state_store
+        self.deadline = deadline
+        self.page_handler = page_handler
+        self.status_handler = status_handler
+        self.integration_factory = integration_factory
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._limits = dict(DEFAULT_PLATFORM_LIMITS, **(platform_limits or {}))
+        self._semaphores = {
+            platform: threading.BoundedSemaphore(limit) for platform, limit in self._limits.items()
+        }
+        self._semaphores_lock = threading.Lock()
+
+    def _limit(self, platform: str) -> int:
+        return min(self._limits.get(platform, self.max_workers), self.max_workers)
+
+    def _semaphore(self, platform: str) -> threading.BoundedSemaphore:
+        with self._semaphores_lock:
+            if platform not in self._semaphores:
+                self._semaphores[platform] = threading.BoundedSemaphore(self._limit(platform))
+            return self._semaphores[platform]
+
+    def _run_platform(self, user_id: int, platform: str, start_date: Optional[str], end_date: Optional[str],
+                      expires_at: Optional[float]) -> Dict[str, Any]:
+        result = {
+            'user_id': user_id,
+            'platform': platform,
+            'status': 'ok',
+            'pages': 0,
+            'rows': 0,
+            'written': 0,
+            'status_updates': 0,
+            'retries': 0,
+            'throttled': 0,
+            'elapsed': 0.0,
+            'waited': 0.0,
+            'window': None,
+            'error': None
+        }
+        queued_at = time.monotonic()
+        semaphore = self._semaphore(platform)
+        timeout = None if expires_at is None else max(0.0, expires_at - queued_at)
+        if not semaphore.acquire(timeout=timeout):
+            result['status'] = 'timeout'
+            result['error'] = "Prazo esgotado aguardando vaga na plataforma"
+            return result
+
+        started = time.monotonic()
+        result['waited'] = started - queued_at
+        new_mark = None
+        integration = None
+        try:
+            integration = self.integration_factory(platform, user_id)
+            if start_date is None:
+                # Modo incremental: janela a partir do estado salvo
+                state = self.state_store.get_sync_state(user_id, platform)
+                mark = state['high_water_mark'] if state else None
+                start_date, end_date, new_mark = integration.incremental_window(mark)
+            result['window'] = (start_date, end_date)
+            for items in self._pages(integration, start_date, end_date):
+                result['pages'] += 1
+                result['rows'] += len(items)
+                if self.page_handler:
+                    result['written'] += self.page_handler(user_id, platform, items) or 0
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    result['status'] = 'timeout'
+                    result['error'] = "Prazo esgotado; sincronização parcial"
+                    break
+            if self.status_handler and result['status'] == 'ok':
+                updates = integration.get_status_updates()
+                if updates:
+                    result['status_updates'] = self.status_handler(user_id, platform, updates) or 0
+        except Exception as e:
+            self.logger.error(f"Falha ao sincronizar {platform} (usuário {user_id}): {e}")
+            result['status'] = 'error'
+            result['error'] = str(e)
+        finally:
+            semaphore.release()
+            result['elapsed'] = time.monotonic() - started
+            if integration is not None:
+                result['retries'] = integration.transport_stats['retries']
+                result['throttled'] = integration.transport_stats['throttled']
+
+        if new_mark is not None:
+            # O high-water mark só avança quando a janela inteira foi lida
+            self.state_store.save_sync_state(
+                user_id, platform,
+                high_water_mark=new_mark if result['status'] == 'ok' else None,
+                status=result['status'],
+                rows=result['rows']
+            )
+        return result
+
+    def _pages(self, integration: BasePlatformIntegration, start_date: str, end_date: str) -> Iterable[List[Dict[str, Any]]]:
+        return integration.iter_sales(start_date, end_date)
+
+    def sync_users(self, jobs: Dict[int, Iterable[str]], start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sincroniza {user_id: [plataformas]} e retorna um resultado por par usuário/plataforma
+
+        Sem período explícito a sincronização é incremental (requer state_store).
+        """
+        if start_date is None and self.state_store is None:
+            raise ValueError("Informe o período ou um state_store para sincronização incremental")
+        if start_date is None and self.page_handler is None:
+            # Sem gravar as páginas, avançar o high-water mark perderia essas vendas
+            raise ValueError("A sincronização incremental requer um page_handler")
+        started = time.monotonic()
+        expires_at = None if self.deadline is None else started + self.deadline
+        tasks = [(user_id, platform) for user_id, platforms in jobs.items() for platform in platforms]
+        if not tasks:
+            return []
+
+        by_platform: Dict[str, List[Tuple[int, str]]] = {}
+        for user_id, platform in tasks:
+            by_platform.setdefault(platform, []).append((user_id, platform))
+
+        # Um executor por plataforma, do tamanho do limite dela: tarefas além do
+        # limite esperam na fila da própria plataforma, sem ocupar threads das
+        # outras. O semáforo continua valendo entre chamadas simultâneas.
+        # Sem "with": o bloco esperaria as tarefas em andamento e ignoraria o prazo
+        executors = [
+            ThreadPoolExecutor(max_workers=min(self._limit(platform), len(platform_tasks)),
+                               thread_name_prefix=f"sync-{platform}")
+            for platform, platform_tasks in by_platform.items()
+        ]
+        try:
+            futures = {
+                executor.submit(self._run_platform, user_id, platform, start_date, end_date, expires_at): (user_id, platform)
+                for executor, platform_tasks in zip(executors, by_platform.values())
+                for user_id, platform in platform_tasks
+            }
+            timeout = None if expires_at is None else max(0.0, expires_at - time.monotonic())
+            done, pending = wait(futures, timeout=timeout)
+
+            results = [future.result() for future in done]
+            for future in pending:
+                # Tarefas em andamento terminam a página atual e param sozinhas no prazo
+                future.cancel()
+                user_id, platform = futures[future]
+                results.append({
+                    'user_id': user_id,
+                    'platform': platform,
+                    'status': 'timeout',
+                    'pages': 0,
+                    'rows': 0,
+                    'written': 0,
+                    'status_updates': 0,
+                    'retries': 0,
+                    'throttled': 0,
+                    'elapsed': time.monotonic() - started,
+                    'waited': 0.0,
+                    'window': None,
+                    'error': "Prazo global esgotado"
+                })
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        self.logger.info(
+            f"Sincronização de {len(tasks)} tarefa(s) concluída em {time.monotonic() - started:.2f}s"
+        )
+        return sorted(results, key=lambda r: (r['user_id'], r['platform']))
+
+    def sync_user(self, user_id: int, platforms: Iterable[str], start_date: Optional[str] = None,
+                  end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Sincroniza todas as plataformas configuradas de um usuário ao mesmo tempo"""
+        return self.sync_users({user_id: platforms}, start_date, end_date)
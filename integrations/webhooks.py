@@ -0,0 +1,290 @@
+"""Receptor de webhooks (postbacks) de vendas das plataformas
+
+Servidor HTTP independente do Streamlit. Cada plataforma envia para
+    POST /webhooks/<plataforma>/<user_id>
+(ex.: /webhooks/hotmart/42). O postback é validado com o segredo salvo em
+credentials['webhook_token'], convertido para as colunas de sales e colocado
+numa fila limitada; uma thread normaliza e grava os eventos em micro-lotes
+via create_sales_bulk (upsert por external_id, então reenvios não duplicam).
+
+Uso:
+    python -m integrations.webhooks [--host 0.0.0.0] [--port 8080] [--dry-run]
+
+Com --dry-run os lotes só são registrados no log, o que permite reenviar
+payloads gravados para a porta local sem banco de dados:
+    curl -X POST localhost:8080/webhooks/monetizze/1 -d @postback.json
+"""
+from typing import Dict, Any, List, Optional, Callable, Tuple
+import argparse
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+import pandas as pd
+
+from .credentials import get_credential_store
+from .sync import PLATFORMS
+
+# (user_id, DataFrame normalizado) -> relatório de create_sales_bulk
+SalesSink = Callable[[int, pd.DataFrame], Dict[str, Any]]
+
+ROUTE = re.compile(r'^/webhooks/(?P<platform>[a-z]+)/(?P<user_id>\d+)/?$')
+PLATFORM_SLUGS = {name.lower(): name for name in PLATFORMS}
+MAX_BODY_SIZE = 1024 * 1024
+
+
+def database_sink() -> SalesSink:
+    """Grava os lotes em sales via DBOperations"""
+    from database.operations import DBOperations
+    return DBOperations().create_sales_bulk
+
+
+def _expand_form(fields: List[Tuple[str, str]]) -> Dict[str, Any]:
+    """Campos de formulário como venda[codigo]=1 viram {'venda': {'codigo': '1'}}"""
+    payload: Dict[str, Any] = {}
+    for key, value in fields:
+        parts = re.findall(r'[^\[\]]+', key) or [key]
+        target = payload
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+            if not isinstance(target, dict):
+                break
+        else:
+            target[parts[-1]] = value
+    return payload
+
+
+def parse_body(content_type: str, body: bytes) -> Dict[str, Any]:
+    if 'application/x-www-form-urlencoded' in (content_type or ''):
+        return _expand_form(parse_qsl(body.decode('utf-8'), keep_blank_values=True))
+    payload = json.loads(body or b'{}')
+    if not isinstance(payload, dict):
+        raise ValueError("Corpo do postback deve ser um objeto JSON")
+    return payload
+
+
+class WebhookReceiver:
+    """Fila limitada + gravação em micro-lotes dos eventos recebidos
+
+    Os eventos são agrupados até `batch_size` ou `flush_interval` segundos, o
+    que vier primeiro, e gravados com um create_sales_bulk por usuário. Com a
+    fila cheia o postback recebe 503 (as plataformas reenviam depois).
+    """
+
+    def __init__(self, sink: Optional[SalesSink] = None, queue_size: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 1.0):
+        self.sink = sink or database_sink()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._queue: "queue.Queue[Tuple[int, str, Dict[str, Any]]]" = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'received': 0,
+            'rejected': 0,
+            'queued': 0,
+            'dropped': 0,
+            'written': 0,
+            'failed': 0,
+            'batches': 0
+        }
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+    def handle(self, platform_slug: str, user_id: int, headers: Any, query: Dict[str, str],
+               body: bytes, content_type: str) -> Tuple[int, str]:
+        """Valida e enfileira um postback; retorna (status HTTP, mensagem)"""
+        self._count('received')
+        platform = PLATFORM_SLUGS.get(platform_slug)
+        if platform is None:
+            self._count('rejected')
+            return 404, "Plataforma desconhecida"
+        integration = PLATFORMS[platform]
+
+        try:
+            payload = parse_body(content_type, body)
+        except ValueError as e:  # inclui JSONDecodeError e UnicodeDecodeError
+            self._count('rejected')
+            return 400, f"Corpo inválido: {e}"
+
+        credentials = get_credential_store().get(user_id, platform)
+        if not integration.verify_webhook(headers, query, body, payload, credentials):
+            self._count('rejected')
+            return 401, "Assinatura inválida"
+
+        try:
+            records = integration.webhook_sales(payload)
+        except Exception as e:  # JSON válido, mas fora do formato da plataforma
+            self._count('rejected')
+            return 400, f"Postback em formato inesperado: {e}"
+        try:
+            for record in records:
+                self._queue.put_nowait((user_id, platform, record))
+        except queue.Full:
+            self._count('dropped')
+            return 503, "Fila cheia, reenvie mais tarde"
+        self._count('queued', len(records))
+        return 200, "OK"
+
+    def _next_batch(self) -> List[Tuple[int, str, Dict[str, Any]]]:
+        """Espera o primeiro evento e junta o que chegar até o lote encher ou o prazo vencer"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> None:
+        by_user: Dict[int, Dict[str, List[Dict[str, Any]]]] = {}
+        for user_id, platform, record in batch:
+            by_user.setdefault(user_id, {}).setdefault(platform, []).append(record)
+        for user_id, by_platform in by_user.items():
+            events = sum(len(records) for records in by_platform.values())
+            try:
+                rows = pd.concat(
+                    [PLATFORMS[platform].normalize_sales(records) for platform, records in by_platform.items()],
+                    ignore_index=True
+                )
+                report = self.sink(user_id, rows)
+                self._count('written', report.get('inserted', 0) + report.get('updated', 0))
+                self._count('failed', report.get('failed', 0))
+                for error in report.get('errors', []):
+                    self.logger.warning(f"Usuário {user_id}: {error}")
+            except Exception as e:
+                self._count('failed', events)
+                self.logger.error(f"Falha ao gravar {events} evento(s) do usuário {user_id}: {e}")
+        self._count('batches')
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self.flush(batch)
+            except Exception:
+                # Um lote ruim não pode parar a thread: a fila encheria e todo
+                # postback passaria a receber 503
+                self._count('failed', len(batch))
+                self.logger.exception(f"Lote de {len(batch)} evento(s) descartado")
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="webhook-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Para a gravação depois de esvaziar a fila"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def make_handler(receiver: WebhookReceiver):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status: int, data: Dict[str, Any]) -> None:
+            body = json.dumps(data).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            if status == 503:
+                self.send_header('Retry-After', '5')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _reply(self, status: int, message: str) -> None:
+            self._send_json(status, {'message': message})
+
+        def do_POST(self) -> None:
+            url = urlsplit(self.path)
+            match = ROUTE.match(url.path)
+            if not match:
+                self._reply(404, "Rota não encontrada")
+                return
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_SIZE:
+                self._reply(413, "Corpo muito grande")
+                return
+            status, message = receiver.handle(
+                match.group('platform'),
+                int(match.group('user_id')),
+                self.headers,
+                dict(parse_qsl(url.query)),
+                self.rfile.read(length),
+                self.headers.get('Content-Type', '')
+            )
+            self._reply(status, message)
+
+        def do_GET(self) -> None:
+            if urlsplit(self.path).path == '/health':
+                self._send_json(200, receiver.stats())
+            else:
+                self._reply(404, "Rota não encontrada")
+
+        def log_message(self, format: str, *args: Any) -> None:
+            receiver.logger.debug(format % args)
+
+    return WebhookHandler
+
+
+def serve(host: str = '0.0.0.0', port: int = 8080, receiver: Optional[WebhookReceiver] = None) -> None:
+    receiver = receiver or WebhookReceiver()
+    server = ThreadingHTTPServer((host, port), make_handler(receiver))
+    receiver.start()
+    receiver.logger.info(f"Recebendo webhooks em http://{host}:{port}/webhooks/<plataforma>/<user_id>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        receiver.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Receptor de webhooks de vendas das plataformas")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--batch-size", type=int, default=500, help="eventos por gravação")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="segundos máximos até gravar")
+    parser.add_argument("--queue-size", type=int, default=10000, help="eventos pendentes antes de responder 503")
+    parser.add_argument("--dry-run", action="store_true", help="só registra os lotes no log, sem banco")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    sink = None
+    if args.dry_run:
+        def sink(user_id, rows):
+            logging.getLogger("dry-run").info(f"Usuário {user_id}: {len(rows)} venda(s)\n{rows.head()}")
+            return {"inserted": len(rows), "failed": 0, "errors": []}
+
+    receiver = WebhookReceiver(sink, args.queue_size, args.batch_size, args.flush_interval)
+    serve(args.host, args.port, receiver)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,92 @@
 import streamlit as st
 from database.operations import DBOperations
+from interface.components.charts import line_chart
 import plotly.express as px
-import pandas as pd
 
 class Analytics:
-    def __init__(self):
+    # Agrupamento temporal -> (chave de aggregate_sales, frequência do pandas)
+    PERIODS = {
+        "Dia": ("day", "D"),
+        "Semana": ("week", "W-MON"),
+        "Mês": ("month", "MS"),
+    }
+
+    def __init__(self, db_ops=None):
         """Ferramentas de análise de desempenho"""
-        self.db_ops = DBOperations()
-    
+        self.db_ops = db_ops or DBOperations()
+
     def show_sales_analytics(self, user_id):
         """Exibe análises detalhadas de vendas"""
         st.title("📈 Análise de Vendas")
-        
-        sales = self.db_ops.get_user_sales(user_id)
-        if not sales:
+
+        min_date, max_date = self.db_ops.get_sales_date_range(user_id) or (None, None)
+        if min_date is None:
             st.warning("Nenhuma venda registrada para análise.")
             return
-        
-        df = pd.DataFrame(sales)
-        df['sale_date'] = pd.to_datetime(df['sale_date'])
-        
-        # Filtros
+
+        # Filtros (aplicados no banco; só as séries desenhadas são lidas)
         st.sidebar.subheader("Filtros")
-        min_date = df['sale_date'].min().date()
-        max_date = df['sale_date'].max().date()
-        
         date_range = st.sidebar.date_input(
             "Período",
             [min_date, max_date],
             min_value=min_date,
             max_value=max_date
         )
-        
-        if len(date_range) == 2:
-            start_date, end_date = date_range
-            df = df[(df['sale_date'].dt.date >= start_date) & 
-                    (df['sale_date'].dt.date <= end_date)]
-        
+        start_date, end_date = date_range if len(date_range) == 2 else (None, None)
+
+        all_platforms = list(self.db_ops.aggregate_sales(user_id, 'platform')['platform'])
+        selected_platforms = st.sidebar.multiselect("Plataformas", all_platforms, default=all_platforms)
+        if not selected_platforms:
+            st.info("Nenhum dado para exibir: selecione ao menos uma plataforma.")
+            return
+        platforms = None if set(selected_platforms) == set(all_platforms) else selected_platforms
+
+        all_products = sorted(self.db_ops.aggregate_sales(user_id, 'product')['product_name'])
+        selected_products = st.sidebar.multiselect("Produtos", all_products, placeholder="Todos")
+        products = selected_products or None
+
+        period_label = st.sidebar.radio("Agrupar por", list(self.PERIODS), horizontal=True)
+        top_n = st.sidebar.slider("Produtos no ranking", 5, 50, 10)
+
+        filters = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'platforms': platforms,
+            'products': products
+        }
+
         # Métricas
-        total_sales = df['amount'].sum()
-        avg_sale = df['amount'].mean()
-        total_units = df['quantity'].sum()
-        
+        totals = self.db_ops.aggregate_sales(user_id, None, **filters).iloc[0]
+        if not totals['sales_count']:
+            st.info("Nenhum dado de vendas para os filtros selecionados.")
+            return
+        total_sales = totals['revenue']
+        avg_sale = total_sales / totals['sales_count'] if totals['sales_count'] else 0
+
         col1, col2, col3 = st.columns(3)
         col1.metric("Total em Vendas", f"R$ {total_sales:,.2f}")
         col2.metric("Ticket Médio", f"R$ {avg_sale:,.2f}")
-        col3.metric("Unidades Vendidas", total_units)
-        
+        col3.metric("Unidades Vendidas", int(totals['units']))
+
         # Gráfico de vendas ao longo do tempo
         st.subheader("Vendas ao Longo do Tempo")
-        df_time = df.groupby(pd.Grouper(key='sale_date', freq='D'))['amount'].sum().reset_index()
-        fig = px.line(df_time, x='sale_date', y='amount', title='Vendas Diárias')
+        group_by, frequency = self.PERIODS[period_label]
+        df_time = self.db_ops.aggregate_sales(user_id, group_by, **filters)
+        # Períodos sem vendas aparecem como zero
+        df_time = (
+            df_time[['period', 'revenue']]
+            .set_index('period')
+            .asfreq(frequency, fill_value=0)
+            .reset_index()
+        )
+        fig = line_chart(df_time, 'period', 'revenue', key='analytics_time', title=f'Vendas por {period_label}',
+                         labels={'period': 'Período', 'revenue': 'Receita'})
         st.plotly_chart(fig)
-        
+
         # Gráfico de produtos mais vendidos
         st.subheader("Produtos Mais Vendidos")
-        df_products = df.groupby('product_name')['quantity'].sum().reset_index()
-        fig = px.bar(df_products, x='product_name', y='quantity', 
-                     title='Quantidade Vendida por Produto')
-        st.plotly_chart(fig)
\ No newline at end of file
+        df_products = self.db_ops.aggregate_sales(user_id, 'product', top_n=top_n, order_by='units', **filters)
+        fig = px.bar(df_products, x='product_name', y='units',
+                     title='Quantidade Vendida por Produto',
+                     labels={'product_name': 'Produto', 'units': 'Unidades'})
+        st.plotly_chart(fig)
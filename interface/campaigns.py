@@ -4,9 +4,9 @@ from datetime import datetime
 from interface.components.delete_modal import delete_modal  
 
 class CampaignManager:
-    def __init__(self):
+    def __init__(self, db_ops=None):
         """Gerenciador de campanhas de marketing"""
-        self.db_ops = DBOperations()
+        self.db_ops = db_ops or DBOperations()
     
     def show_campaign_form(self, user_id):
         """Exibe o formulário para criação de novas campanhas"""
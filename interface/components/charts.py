@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+# Máximo de pontos por série enviados ao navegador
+MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", 1000))
+
+
+def _as_float(values):
+    """Eixo numérico para os cálculos (datas viram segundos desde o 1º ponto)"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = (values - values[0]) / np.timedelta64(1, 's')
+    return np.nan_to_num(values.astype('float64'))
+
+
+def minmax_indices(y, max_points):
+    """Mínimo e máximo de cada faixa (picos e vales preservados), mais as pontas"""
+    n = len(y)
+    if n <= max_points or max_points < 4:
+        return np.arange(n)
+    buckets = (max_points - 2) // 2
+    inner = _as_float(y)[1:-1]
+    size = -(-len(inner) // buckets)
+    padding = size * buckets - len(inner)
+    lows = np.concatenate([inner, np.full(padding, np.inf)]).reshape(buckets, size)
+    highs = np.concatenate([inner, np.full(padding, -np.inf)]).reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    picked = np.concatenate([offsets + lows.argmin(axis=1), offsets + highs.argmax(axis=1)])
+    picked = picked[picked < len(inner)] + 1
+    return np.unique(np.concatenate([[0], picked, [n - 1]]))
+
+
+def lttb_indices(x, y, max_points):
+    """Largest-Triangle-Three-Buckets: o ponto de cada faixa que forma o maior
+    triângulo com o escolhido na faixa anterior e a média da seguinte
+
+    O laço é por faixa (max_points iterações); dentro dela tudo é vetorizado e
+    as médias vêm de somas acumuladas.
+    """
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = _as_float(y)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    sum_x = np.concatenate([[0.0], np.cumsum(x)])
+    sum_y = np.concatenate([[0.0], np.cumsum(y)])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = (sum_x[next_end] - sum_x[next_start]) / (next_end - next_start)
+        avg_y = (sum_y[next_end] - sum_y[next_start]) / (next_end - next_start)
+        prev_x, prev_y = x[previous], y[previous]
+        areas = np.abs((prev_x - avg_x) * (y[start:end] - prev_y) - (prev_x - x[start:end]) * (avg_y - prev_y))
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+    return selected
+
+
+def downsample(df, x, y, max_points=MAX_POINTS, method='lttb'):
+    """Até `max_points` linhas de `df` (ordenado por x) que preservam o formato de y"""
+    if len(df) <= max_points:
+        return df
+    if method == 'lttb':
+        indices = lttb_indices(df[x].to_numpy(), df[y].to_numpy(), max_points)
+    elif method == 'minmax':
+        indices = minmax_indices(df[y].to_numpy(), max_points)
+    else:
+        raise ValueError(f"Método de redução desconhecido: {method}")
+    return df.iloc[indices]
+
+
+def _slider_value(value):
+    return value.to_pydatetime() if isinstance(value, pd.Timestamp) else value
+
+
+def line_chart(df, x, y, key, max_points=MAX_POINTS, method='lttb', **px_kwargs):
+    """px.line com no máximo `max_points` pontos, reamostrado ao aproximar
+
+    Quando a série passa do limite aparece um controle de intervalo: ao
+    estreitá-lo, só o trecho escolhido é reduzido, então o detalhe aumenta
+    conforme o zoom. Retorna a figura para ajustes antes do st.plotly_chart.
+    """
+    data = df if df[x].is_monotonic_increasing else df.sort_values(x)
+    total = len(data)
+    if total > max_points:
+        first, last = _slider_value(data[x].iloc[0]), _slider_value(data[x].iloc[-1])
+        # Os limites entram na chave: se a série mudar, o zoom volta ao total
+        start, end = st.slider("Intervalo", min_value=first, max_value=last,
+                               value=(first, last), key=f"{key}_zoom_{first}_{last}")
+        data = data[(data[x] >= start) & (data[x] <= end)]
+
+    sample = downsample(data, x, y, max_points, method)
+    if len(sample) < total:
+        st.caption(f"Exibindo {len(sample):,} de {len(data):,} pontos do intervalo ({total:,} no total)")
+    return px.line(sample, x=x, y=y, **px_kwargs)
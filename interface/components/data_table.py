@@ -0,0 +1,99 @@
+import streamlit as st
+import pandas as pd
+
+# Formatos de exibição (printf do column_config): os valores continuam numéricos
+COLUMN_FORMATS = {
+    'money': "R$ %.2f",
+    'percent': "%.2f%%",
+    'int': "%d",
+}
+
+
+def column_config(columns):
+    """column_config do st.dataframe a partir de {coluna: (rótulo, tipo)}
+
+    Tipos: 'money', 'percent', 'int', 'date' ou 'text'.
+    """
+    config = {}
+    for name, (label, kind) in columns.items():
+        if kind in COLUMN_FORMATS:
+            config[name] = st.column_config.NumberColumn(label, format=COLUMN_FORMATS[kind])
+        elif kind == 'date':
+            config[name] = st.column_config.DateColumn(label, format="DD/MM/YYYY")
+        else:
+            config[name] = st.column_config.TextColumn(label)
+    return config
+
+
+def numeric_frame(frame, columns):
+    """Converte as colunas numéricas de uma vez (ex.: Decimal do MySQL -> float64)"""
+    converted = {}
+    for name, (_, kind) in columns.items():
+        if name not in frame:
+            continue
+        if kind in ('money', 'percent'):
+            converted[name] = pd.to_numeric(frame[name], errors='coerce').astype('float64')
+        elif kind == 'int':
+            converted[name] = pd.to_numeric(frame[name], errors='coerce')
+    return frame.assign(**converted) if converted else frame
+
+
+def data_table(frame, columns):
+    """Tabela com colunas numéricas formatadas na exibição, sem virar texto
+
+    Só as colunas de `columns` aparecem, na ordem do dicionário e com os
+    rótulos dele; o DataFrame não é copiado nem renomeado.
+    """
+    st.dataframe(
+        numeric_frame(frame, columns),
+        column_order=list(columns),
+        column_config=column_config(columns),
+        hide_index=True
+    )
+
+
+def paged_table(fetch_page, columns, key, filters, sort_options, page_size=50, prepare=None):
+    """Tabela paginada pela consulta: uma página por vez, ordenada no banco
+
+    `fetch_page(order_by, ascending, cursor, direction, page_size)` devolve
+    {"rows", "next_cursor", "prev_cursor"} (ver DBOperations.get_sales_page).
+    `sort_options` mapeia o rótulo exibido -> chave de ordenação da consulta.
+    A paginação volta ao início quando `filters` ou a ordenação mudam.
+    `prepare` recebe o DataFrame da página (colunas calculadas, por exemplo).
+    """
+    col_sort, col_order = st.columns([3, 1])
+    with col_sort:
+        sort_label = st.selectbox("Ordenar por", list(sort_options), key=f"{key}_sort")
+    with col_order:
+        ascending = st.radio("Ordem", ["Decrescente", "Crescente"], key=f"{key}_order",
+                             horizontal=True) == "Crescente"
+    order_by = sort_options[sort_label]
+
+    state_key = f"{key}_page"
+    signature = (filters, order_by, ascending)
+    state = st.session_state.get(state_key)
+    if not state or state['signature'] != signature:
+        state = {'signature': signature, 'cursor': None, 'direction': 'next', 'number': 1}
+        st.session_state[state_key] = state
+
+    page = fetch_page(order_by, ascending, state['cursor'], state['direction'], page_size)
+    if not page['rows']:
+        st.info("Nenhum registro nesta página.")
+        return
+
+    frame = numeric_frame(pd.DataFrame.from_records(page['rows']), columns)
+    if prepare is not None:
+        frame = prepare(frame)
+    data_table(frame, columns)
+
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("⬅️ Anterior", disabled=page['prev_cursor'] is None, key=f"{key}_prev"):
+            state.update(cursor=page['prev_cursor'], direction='prev', number=state['number'] - 1)
+            st.rerun()
+    with col2:
+        st.caption(f"Página {state['number']}")
+    with col3:
+        if st.button("Próxima ➡️", disabled=page['next_cursor'] is None, key=f"{key}_next"):
+            state.update(cursor=page['next_cursor'], direction='next', number=state['number'] + 1)
+            st.rerun()
@@ -1,154 +1,179 @@
 # dashboard.py
 import streamlit as st
-from datetime import datetime
-import time
+from datetime import timedelta
 from database.operations import DBOperations
+from database.rollups import COUNTED_STATUS
+from interface.components.charts import line_chart
 import pandas as pd
 import plotly.express as px
 
 class Dashboard:
-    def __init__(self):
-        self.db_ops = DBOperations()
-        self.last_checked = datetime.now()
-    
+    # Vendas já commitadas podem ter created_at anterior à marca d'água
+    # (transações longas): essa janela é relida a cada atualização
+    LATE_COMMIT_WINDOW = timedelta(seconds=30)
+    # Acima disso num único ciclo (ex.: importação em massa) recarrega os totais
+    MAX_INCREMENTAL_SALES = 5000
+    RECENT_LIMIT = 5
+    MAX_TOASTS = 3
+
+    def __init__(self, db_ops=None):
+        self.db_ops = db_ops or DBOperations()
+
     def show_dashboard(self, user_id):
         """Dashboard com atualização automática"""
         st.title("📊 Dashboard em Tempo Real")
-        
+
         # Configurações de atualização
         auto_refresh = st.sidebar.checkbox("Atualização Automática", value=True)
         refresh_rate = st.sidebar.slider("Intervalo (segundos)", 2, 60, 5)
-        
-        # Container principal
-        placeholder = st.empty()
-        
-        while auto_refresh:
-            self._update_ui(placeholder, user_id)
-            time.sleep(refresh_rate)  # Agora usando o módulo time correto
-            
-            # Verifica se o usuário desativou a atualização
-            if not st.session_state.get('auto_refresh', True):
-                break
-    
-    def _update_ui(self, placeholder, user_id):
-        """Atualiza o conteúdo do dashboard"""
-        with placeholder.container():
-            # Seu conteúdo existente aqui
-            pass
-    
-    def _check_new_sales(self, user_id):
-        """Verifica novas vendas e mostra notificações"""
-        query = """
-            SELECT product_name, amount, quantity 
-            FROM sales 
-            WHERE user_id = %s AND created_at > %s
-            ORDER BY created_at DESC
-        """
-        results = self.db_ops.execute_fetch_query(query, (user_id, self.last_checked))
-        
-        if results:
-            for sale in results:
-                total = float(sale['amount']) * int(sale['quantity'])
-                st.toast(f"✅ Nova venda: {sale['product_name']} - R$ {total:.2f}", icon="💰")
-            self.last_checked = datetime.now()
-    
-    def _update_ui(self, placeholder, user_id):
-        """Atualiza todo o conteúdo do dashboard"""
-        with placeholder.container():
-            # Seção de métricas
-            st.header("📈 Métricas Principais")
-            self._show_key_metrics(user_id)
-            
-            # Seção de gráficos
-            st.header("📊 Visualizações")
-            self._show_sales_charts(user_id)
-            
-            # Últimas transações
-            st.header("🔄 Atividade Recente")
-            self._show_recent_activity(user_id)
-    
-    def _show_key_metrics(self, user_id):
+        if st.sidebar.button("Recarregar totais"):
+            # Reembolsos e novas despesas só entram ao recarregar o retrato
+            st.session_state.pop(self._state_key(user_id), None)
+
+        fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+        if fragment is None:
+            # Streamlit sem fragments: atualiza a cada interação com a página
+            self._show_live_panel(user_id)
+            return
+
+        # Só o painel é reexecutado no intervalo, sem prender a thread com sleep
+        live_panel = fragment(run_every=refresh_rate if auto_refresh else None)(self._show_live_panel)
+        live_panel(user_id)
+
+    def _state_key(self, user_id):
+        return f"dashboard_live_{user_id}"
+
+    def _show_live_panel(self, user_id):
+        """Atualiza os totais da sessão com as vendas novas e redesenha o painel"""
+        state = self._refresh_state(user_id)
+
+        # Seção de métricas
+        st.header("📈 Métricas Principais")
+        self._show_key_metrics(state)
+
+        # Seção de gráficos
+        st.header("📊 Visualizações")
+        self._show_sales_charts(state)
+
+        # Últimas transações
+        st.header("🔄 Atividade Recente")
+        self._show_recent_activity(state)
+
+    def _load_snapshot(self, user_id):
+        """Totais completos (agregados diários) e a marca d'água inicial"""
+        snapshot = self.db_ops.get_dashboard_snapshot(user_id, self.RECENT_LIMIT, self.LATE_COMMIT_WINDOW)
+        return {
+            'expenses': float(snapshot['expenses']),
+            'by_platform': {platform: float(value) for platform, value in snapshot['by_platform'].items()},
+            'by_day': {day: float(value) for day, value in snapshot['by_day'].items()},
+            'recent': snapshot['recent'],
+            'watermark': snapshot['watermark'],
+            'seen': snapshot['seen']
+        }
+
+    def _refresh_state(self, user_id):
+        """Busca só as vendas após a marca d'água da sessão e as soma aos totais"""
+        key = self._state_key(user_id)
+        state = st.session_state.get(key)
+        if state is None:
+            state = self._load_snapshot(user_id)
+        else:
+            since = state['watermark'] - self.LATE_COMMIT_WINDOW if state['watermark'] else None
+            sales = self.db_ops.get_sales_since(user_id, since, limit=self.MAX_INCREMENTAL_SALES + len(state['seen']) + 1)
+            new_sales = [sale for sale in sales if sale['id'] not in state['seen']]
+            if len(new_sales) > self.MAX_INCREMENTAL_SALES:
+                state = self._load_snapshot(user_id)
+            elif new_sales:
+                self._fold_sales(state, new_sales)
+                self._notify_new_sales(new_sales)
+        st.session_state[key] = state
+        return state
+
+    def _fold_sales(self, state, sales):
+        """Soma vendas novas aos totais (mesma regra dos agregados: só aprovadas)"""
+        for sale in sales:
+            if sale['status'] != COUNTED_STATUS:
+                continue
+            total = float(sale['amount']) * int(sale['quantity'])
+            state['by_platform'][sale['platform']] = state['by_platform'].get(sale['platform'], 0.0) + total
+            state['by_day'][sale['sale_date']] = state['by_day'].get(sale['sale_date'], 0.0) + total
+
+        recent = sorted(state['recent'] + sales, key=lambda sale: (sale['created_at'], sale['id']), reverse=True)
+        state['recent'] = recent[:self.RECENT_LIMIT]
+
+        # Mantém só os ids da janela de releitura após a nova marca d'água
+        newest = sales[-1]['created_at']  # get_sales_since ordena por created_at
+        state['watermark'] = max(state['watermark'], newest) if state['watermark'] else newest
+        state['seen'].update((sale['id'], sale['created_at']) for sale in sales)
+        window_start = state['watermark'] - self.LATE_COMMIT_WINDOW
+        state['seen'] = {sale_id: created_at for sale_id, created_at in state['seen'].items() if created_at >= window_start}
+
+    def _notify_new_sales(self, sales):
+        """Notifica as vendas novas (um resumo quando forem muitas)"""
+        for sale in sales[-self.MAX_TOASTS:]:
+            total = float(sale['amount']) * int(sale['quantity'])
+            st.toast(f"✅ Nova venda: {sale['product_name']} - R$ {total:.2f}", icon="💰")
+        if len(sales) > self.MAX_TOASTS:
+            st.toast(f"+{len(sales) - self.MAX_TOASTS} nova(s) venda(s)", icon="💰")
+
+    def _show_key_metrics(self, state):
         """Mostra os cards com as métricas principais"""
-        metrics = self.db_ops.calculate_roi(user_id)
-        
+        revenue = sum(state['by_platform'].values())
+        expenses = state['expenses']
+        roi = ((revenue - expenses) / expenses * 100) if expenses > 0 else 0
+
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Receita Total", f"R$ {metrics['revenue']:,.2f}")
+            st.metric("Receita Total", f"R$ {revenue:,.2f}")
         with col2:
-            st.metric("Investimento", f"R$ {metrics['expenses']:,.2f}")
+            st.metric("Investimento", f"R$ {expenses:,.2f}")
         with col3:
-            st.metric("Lucro", f"R$ {metrics['profit']:,.2f}")
+            st.metric("Lucro", f"R$ {revenue - expenses:,.2f}")
         with col4:
-            st.metric("ROI", f"{metrics['roi']:.1f}%")
-    
-    def _show_sales_charts(self, user_id):
+            st.metric("ROI", f"{roi:.1f}%")
+
+    def _show_sales_charts(self, state):
         """Mostra os gráficos de vendas"""
-        sales = self.db_ops.get_user_sales(user_id)
-        
-        if sales:
-            df = pd.DataFrame(sales)
-            df['total'] = df['amount'] * df['quantity']
-            
-            tab1, tab2 = st.tabs(["Por Plataforma", "Histórico"])
-            
-            with tab1:
-                fig = px.pie(df, names='platform', values='total', 
-                            title='Distribuição por Plataforma')
-                st.plotly_chart(fig, use_container_width=True)
-            
-            with tab2:
-                fig = px.line(df.groupby('sale_date')['total'].sum().reset_index(), 
-                             x='sale_date', y='total',
+        if not state['by_day']:
+            return
+
+        tab1, tab2 = st.tabs(["Por Plataforma", "Histórico"])
+
+        with tab1:
+            by_platform = pd.DataFrame(list(state['by_platform'].items()), columns=['platform', 'total'])
+            fig = px.pie(by_platform, names='platform', values='total',
+                        title='Distribuição por Plataforma')
+            st.plotly_chart(fig, use_container_width=True)
+
+        with tab2:
+            by_day = pd.DataFrame(sorted(state['by_day'].items()), columns=['sale_date', 'total'])
+            by_day['sale_date'] = pd.to_datetime(by_day['sale_date'])
+            fig = line_chart(by_day, 'sale_date', 'total', key='dashboard_history',
                              title='Vendas ao Longo do Tempo')
-                st.plotly_chart(fig, use_container_width=True)
-    
-    def _show_recent_activity(self, user_id):
-        """Mostra as últimas vendas registradas (versão corrigida)"""
-        try:
-            sales = self.db_ops.get_user_sales(user_id, limit=5)
-            
-            if not sales:
-                st.warning("Nenhuma venda registrada ainda")
-                return
-                
-            st.subheader("🔄 Últimas Vendas")
-            
-            for sale in sales:
-                cols = st.columns([2, 1, 1, 1, 1])  # Adicionei uma coluna extra para status
-                
-                with cols[0]:
-                    st.markdown(f"**{sale.get('product_name', 'N/A')}**")
-                with cols[1]:
-                    st.markdown(f"R$ {float(sale.get('amount', 0)):.2f}")
-                with cols[2]:
-                    st.markdown(f"x{sale.get('quantity', 1)}")
-                with cols[3]:
-                    st.markdown(f"`{sale.get('sale_date', 'Data desconhecida')}`")
-                with cols[4]:
-                    st.markdown(f"`{sale.get('status', 'Concluído')}`")
-                
-                st.divider()
-                
-        except Exception as e:
-            st.error(f"Erro ao carregar vendas recentes: {str(e)}")
-
-    def _update_ui(self, placeholder, user_id):
-        with placeholder.container():
-            # ... outros componentes
-            self._show_recent_activity(user_id)
-
-# Adicione este método ao seu DBOperations
-"""
-def get_user_sales(self, user_id, limit=None):
-    conn = self.db.connect()
-    cursor = conn.cursor(dictionary=True)
-    try:
-        query = "SELECT * FROM sales WHERE user_id = %s ORDER BY created_at DESC"
-        if limit:
-            query += f" LIMIT {limit}"
-        cursor.execute(query, (user_id,))
-        return cursor.fetchall()
-    finally:
-        cursor.close()
-        conn.close()
-"""
\ No newline at end of file
+            st.plotly_chart(fig, use_container_width=True)
+
+    def _show_recent_activity(self, state):
+        """Mostra as últimas vendas registradas"""
+        sales = state['recent']
+
+        if not sales:
+            st.warning("Nenhuma venda registrada ainda")
+            return
+
+        st.subheader("🔄 Últimas Vendas")
+
+        for sale in sales:
+            cols = st.columns([2, 1, 1, 1, 1])
+
+            with cols[0]:
+                st.markdown(f"**{sale.get('product_name', 'N/A')}**")
+            with cols[1]:
+                st.markdown(f"R$ {float(sale.get('amount', 0)):.2f}")
+            with cols[2]:
+                st.markdown(f"x{sale.get('quantity', 1)}")
+            with cols[3]:
+                st.markdown(f"`{sale.get('sale_date', 'Data desconhecida')}`")
+            with cols[4]:
+                st.markdown(f"`{sale.get('status', 'Concluído')}`")
+
+            st.divider()
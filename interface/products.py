@@ -2,9 +2,9 @@ import streamlit as st
 from database.operations import DBOperations
 
 class ProductManager:
-    def __init__(self):
+    def __init__(self, db_ops=None):
         """Gerenciador de produtos do infoproduto"""
-        self.db_ops = DBOperations()
+        self.db_ops = db_ops or DBOperations()
     
     def show_product_form(self, user_id):
         """Exibe formulário para cadastro de novos produtos"""
@@ -51,9 +51,12 @@ class ProductManager:
                         self._show_edit_form(product)
                 with col2:
                     if st.button(f"Excluir {product['name']}", key=f"delete_{product['id']}"):
-                        if self.db_ops.delete_product(product['id']):
-                            st.success("Produto excluído com sucesso!")
+                        result = self.db_ops.delete_product(product['id'])
+                        if result["success"]:
+                            st.success(result["message"])
                             st.rerun()
+                        else:
+                            st.error(result["message"])
     
     def _show_edit_form(self, product):
         """Exibe formulário de edição de produto"""
@@ -80,45 +83,3 @@ class ProductManager:
                     ):
                         st.success("Produto atualizado com sucesso!")
                         st.rerun()
-
-    def delete_product(self, product_id):
-        """Exclui um produto do banco de dados"""
-        conn = self.db.connect()
-        cursor = conn.cursor()
-        try:
-            # Verifica se existem vendas associadas
-            cursor.execute("SELECT COUNT(*) FROM sales WHERE product_name IN (SELECT name FROM products WHERE id = %s)", (product_id,))
-            if cursor.fetchone()[0] > 0:
-                st.warning("Este produto possui vendas associadas e não pode ser excluído.")
-                return False
-            
-            cursor.execute("DELETE FROM products WHERE id = %s", (product_id,))
-            conn.commit()
-            st.success("Produto excluído com sucesso!")
-            return True
-        except Exception as e:
-            st.error(f"Erro ao excluir produto: {e}")
-            return False
-        finally:
-            cursor.close()
-            conn.close()
-
-    # Interface Streamlit para exclusão
-    def delete_product_ui(self, user_id):
-        """Mostra a interface para excluir produtos"""
-        products = self.get_user_products(user_id)
-        if not products:
-            st.info("Nenhum produto cadastrado.")
-            return
-
-        with st.expander("🔴 Excluir Produto"):
-            selected = st.selectbox(
-                "Selecione o produto para excluir",
-                options=[(p['id'], p['name']) for p in products],
-                format_func=lambda x: f"{x[0]} - {x[1]}"
-            )
-
-            if st.button("Excluir Produto", type="primary"):
-                product_id = selected[0]
-                if self.delete_product(product_id):
-                    st.rerun()
\ No newline at end of file
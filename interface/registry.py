@@ -0,0 +1,48 @@
+"""Recursos do processo e registro de páginas do app
+
+O Streamlit reexecuta app.py inteiro a cada interação. Os objetos da camada
+de banco são criados uma vez por processo (st.cache_resource) e reaproveitados
+por todas as sessões; das páginas, só a selecionada é importada e construída.
+"""
+import importlib
+
+import streamlit as st
+
+from database.db import DatabaseManager
+from database.operations import DBOperations
+
+# Nome no menu -> (módulo, classe, métodos exibidos em ordem)
+PAGES = {
+    "Dashboard": ("interface.dashboard", "Dashboard", ("show_dashboard",)),
+    "Produtos": ("interface.products", "ProductManager", ("show_product_form", "show_product_list")),
+    "Campanhas": ("interface.campaigns", "CampaignManager", ("show_campaign_form", "show_campaign_list")),
+    "Vendas e Lucros": ("interface.sales_profit", "SalesProfitAnalysis", ("show_sales_profit_analysis",)),
+    "Análise de ROI": ("interface.roi", "ROIAnalysis", ("show_roi_analysis",)),
+    "Análises": ("interface.analytics", "Analytics", ("show_sales_analytics",)),
+}
+
+
+@st.cache_resource(show_spinner=False)
+def init_database():
+    """Aplica as migrações pendentes uma única vez por processo
+
+    Retorna a lista de versões aplicadas (quem exibe o aviso a esvazia). Sem
+    chamadas de UI aqui: o cache_resource as repetiria a cada acerto. Falhas
+    levantam exceção, então nada é cacheado e a próxima execução tenta de novo.
+    """
+    return DatabaseManager().initialize_database()
+
+
+@st.cache_resource(show_spinner=False)
+def get_db_operations():
+    """DBOperations compartilhado (usa o pool de conexões do processo)"""
+    return DBOperations()
+
+
+def render_page(name, user_id):
+    """Importa, constrói e exibe só a página selecionada"""
+    module_name, class_name, methods = PAGES[name]
+    page_class = getattr(importlib.import_module(module_name), class_name)
+    page = page_class(get_db_operations())
+    for method in methods:
+        getattr(page, method)(user_id)
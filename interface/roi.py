@@ -1,12 +1,25 @@
 import streamlit as st
 from database.operations import DBOperations
-import plotly.express as px
+from interface.components.data_table import data_table
+from interface.components.charts import line_chart
 import pandas as pd
 
 class ROIAnalysis:
-    def __init__(self):
+    # Tabela por campanha: (rótulo, tipo de exibição)
+    CAMPAIGN_COLUMNS = {
+        'campaign_name': ('Campanha', 'text'),
+        'platform': ('Plataforma', 'text'),
+        'budget': ('Orçamento', 'money'),
+        'investment': ('Investimento', 'money'),
+        'revenue': ('Receita', 'money'),
+        'roi': ('ROI', 'percent'),
+        'start_date': ('Início', 'date'),
+        'end_date': ('Fim', 'date'),
+    }
+
+    def __init__(self, db_ops=None):
         """Análise detalhada de ROI"""
-        self.db_ops = DBOperations()
+        self.db_ops = db_ops or DBOperations()
     
     def show_roi_analysis(self, user_id):
         """Exibe análise detalhada de ROI"""
@@ -33,10 +46,13 @@ class ROIAnalysis:
             
             # Verifica se temos dados válidos para o gráfico
             if not df_roi.empty and 'period' in df_roi.columns and 'roi' in df_roi.columns:
-                fig = px.line(
-                    df_roi, 
-                    x='period', 
-                    y='roi', 
+                # Períodos 'AAAA-MM' viram datas para o eixo e o controle de intervalo
+                df_roi['period'] = pd.to_datetime(df_roi['period'], format='%Y-%m')
+                fig = line_chart(
+                    df_roi,
+                    'period',
+                    'roi',
+                    key='roi_evolution',
                     title='Evolução do ROI',
                     labels={'period': 'Período', 'roi': 'ROI (%)'},
                     markers=True
@@ -54,17 +70,8 @@ class ROIAnalysis:
             st.subheader("Detalhes por Campanha")
             if roi_data.get('campaigns_roi'):
                 df_campaigns = pd.DataFrame(roi_data['campaigns_roi'])
-                
-                # Formata as colunas numéricas
-                numeric_cols = ['budget', 'revenue', 'investment', 'roi']
-                for col in numeric_cols:
-                    if col in df_campaigns.columns:
-                        if col == 'roi':
-                            df_campaigns[col] = df_campaigns[col].apply(lambda x: f"{x:.2f}%")
-                        else:
-                            df_campaigns[col] = df_campaigns[col].apply(lambda x: f"R$ {x:,.2f}")
-                
-                st.dataframe(df_campaigns)
+                # Colunas seguem numéricas; moeda e % só na exibição
+                data_table(df_campaigns, self.CAMPAIGN_COLUMNS)
             else:
                 st.warning("Nenhuma campanha disponível para análise.")
                 
@@ -1,13 +1,13 @@
 import streamlit as st
 from database.operations import DBOperations
+from interface.components.data_table import paged_table
 import plotly.express as px
-import pandas as pd
 from datetime import datetime, date
 
 class SalesProfitAnalysis:
-    def __init__(self):
+    def __init__(self, db_ops=None):
         """Análise de vendas e lucros"""
-        self.db_ops = DBOperations()
+        self.db_ops = db_ops or DBOperations()
     
     def show_sales_profit_analysis(self, user_id):
         """Exibe análise de vendas e lucros"""
@@ -35,20 +35,20 @@ class SalesProfitAnalysis:
                 
             start_date, end_date = date_range
             
-            # Obter dados filtrados
-            sales_data = self.db_ops.get_sales_profit_data(user_id, start_date, end_date)
+            # Obter dados filtrados (DataFrame já tipado)
+            sales_df = self.db_ops.get_sales_profit_frame(user_id, start_date, end_date)
             
-            if not sales_data:
+            if sales_df.empty:
                 st.warning("Nenhuma venda registrada no período selecionado.")
                 return
             
             # Processa os dados para análise
-            df = self._process_sales_data(sales_data)
+            df = self._process_sales_data(sales_df)
             
             # Exibe métricas e visualizações
             self._display_metrics(df)
             self._display_profit_chart(df)
-            self._display_sales_table(df)
+            self._display_sales_table(user_id, start_date, end_date)
             
         except Exception as e:
             st.error(f"Erro ao carregar análise de vendas: {str(e)}")
@@ -71,11 +71,10 @@ class SalesProfitAnalysis:
             
         return min_date, max_date
 
-    def _process_sales_data(self, sales_data):
+    def _process_sales_data(self, df):
         """Processa os dados de vendas para análise"""
-        if not sales_data:
+        if df.empty:
             raise ValueError("Nenhuma venda registrada.")
-        df = pd.DataFrame(sales_data)
 
         # Validação adicional dos dados
         if df['amount'].min() <= 0:
@@ -105,7 +104,7 @@ class SalesProfitAnalysis:
         st.subheader("Vendas vs Lucro por Produto")
         
         # Agrupa por produto
-        df_grouped = df.groupby('product_name')[['total_sale', 'profit']].sum().reset_index()
+        df_grouped = df.groupby('product_name', observed=True)[['total_sale', 'profit']].sum().reset_index()
         
         fig = px.bar(
             df_grouped, 
@@ -125,26 +124,53 @@ class SalesProfitAnalysis:
         
         st.plotly_chart(fig)
 
-    def _display_sales_table(self, df):
-        """Exibe tabela detalhada de vendas"""
+    PAGE_SIZE = 50
+
+    # Colunas da tabela de detalhes: (rótulo, tipo de exibição)
+    SALES_TABLE_COLUMNS = {
+        'product_name': ('Produto', 'text'),
+        'sale_date': ('Data Venda', 'date'),
+        'platform': ('Plataforma', 'text'),
+        'quantity': ('Quantidade', 'int'),
+        'amount': ('Preço Unitário', 'money'),
+        'total_sale': ('Total Venda', 'money'),
+        'profit': ('Lucro', 'money'),
+        'profit_margin': ('Margem (%)', 'percent'),
+    }
+    # Ordenações feitas pela consulta (chaves de DBOperations.PAGE_KEYS)
+    SALES_TABLE_SORTS = {
+        'Data da venda': 'sale_date',
+        'Total da venda': 'total_sale',
+        'Lucro': 'profit',
+        'Preço unitário': 'amount',
+        'Quantidade': 'quantity',
+    }
+
+    def _display_sales_table(self, user_id, start_date, end_date):
+        """Exibe tabela detalhada de vendas, uma página por vez (paginação por chave)"""
         st.subheader("Detalhes das Vendas")
-        
-        # Seleciona e renomeia colunas para exibição
-        display_df = df[[
-            'product_name', 'sale_date', 'platform', 
-            'quantity', 'amount', 'total_sale', 
-            'profit', 'profit_margin'
-        ]].copy()
-        
-        display_df.columns = [
-            'Produto', 'Data Venda', 'Plataforma',
-            'Quantidade', 'Preço Unitário', 'Total Venda',
-            'Lucro', 'Margem (%)'
-        ]
-        
-        # Formata valores monetários
-        display_df['Preço Unitário'] = display_df['Preço Unitário'].apply(lambda x: f"R$ {x:,.2f}")
-        display_df['Total Venda'] = display_df['Total Venda'].apply(lambda x: f"R$ {x:,.2f}")
-        display_df['Lucro'] = display_df['Lucro'].apply(lambda x: f"R$ {x:,.2f}")
-        
-        st.dataframe(display_df.sort_values('Data Venda', ascending=False))
\ No newline at end of file
+
+        def fetch_page(order_by, ascending, cursor, direction, page_size):
+            return self.db_ops.get_sales_page(
+                user_id,
+                order_by=order_by,
+                page_size=page_size,
+                cursor=cursor,
+                direction=direction,
+                start_date=start_date,
+                end_date=end_date,
+                ascending=ascending
+            )
+
+        def add_margin(df):
+            return df.assign(profit_margin=(df['profit'] / df['total_sale'] * 100).round(2))
+
+        paged_table(
+            fetch_page,
+            self.SALES_TABLE_COLUMNS,
+            key='sales_table',
+            filters=(user_id, start_date, end_date),
+            sort_options=self.SALES_TABLE_SORTS,
+            page_size=self.PAGE_SIZE,
+            prepare=add_margin
+        )
@@ -27,19 +27,20 @@ class SalesManager:
         if 'selected_product' not in st.session_state:
             st.session_state.selected_product = products[0]
         
+        # Produtos indexados pelo id (busca direta em vez de varrer por nome)
+        products_by_id = {p['id']: p for p in products}
+        
         # Atualiza o produto selecionado quando muda
-        selected_product_name = st.selectbox(
+        selected_product_id = st.selectbox(
             "Selecione o produto*",
-            options=[p['name'] for p in products],
+            options=list(products_by_id),
+            format_func=lambda product_id: products_by_id[product_id]['name'],
             index=0,
             key="product_select"
         )
         
         # Atualiza o produto na sessão
-        st.session_state.selected_product = next(
-            (p for p in products if p['name'] == selected_product_name),
-            products[0]
-        )
+        st.session_state.selected_product = products_by_id.get(selected_product_id, products[0])
         
         current_product = st.session_state.selected_product
         
@@ -91,6 +92,7 @@ class SalesManager:
             if st.form_submit_button("📝 Registrar Venda", use_container_width=True):
                 success = self.db_ops.create_sale(
                     user_id=user_id,
+                    product_id=current_product['id'],
                     product_name=current_product['name'],
                     amount=sale_price,
                     quantity=quantity,
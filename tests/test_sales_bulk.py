@@ -0,0 +1,115 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+from mysql.connector import Error, errorcode
+
+from database.operations import DBOperations
+
+
+class FakeCursor:
+    """Cursor em memória com o mínimo de SQL usado por create_sales_bulk"""
+
+    def __init__(self, sales, queries, deadlocks):
+        self.sales = sales
+        self.queries = queries
+        self.deadlocks = deadlocks
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        if "FROM sales" in query and "external_id" in query:
+            keys = list(zip(params[1::2], params[2::2]))
+            self.rows = [
+                (platform, external_id, *self.sales[(platform, external_id)])
+                for platform, external_id in keys if (platform, external_id) in self.sales
+            ]
+        else:
+            self.rows = []
+
+    def executemany(self, query, rows):
+        if "INSERT INTO sales\n" not in query:
+            return
+        if self.deadlocks:
+            self.deadlocks.pop()
+            raise Error(msg="Deadlock found", errno=errorcode.ER_LOCK_DEADLOCK)
+        for _, _, product_name, amount, quantity, _, sale_date, platform, external_id, status in rows:
+            # O MySQL converte o texto para DATE e devolve datetime.date
+            if isinstance(sale_date, str):
+                sale_date = date.fromisoformat(sale_date)
+            self.sales[(platform, external_id)] = (product_name, Decimal(amount), quantity, sale_date, status)
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.database.sales, self.database.queries, self.database.deadlocks)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.sales = {}
+        self.queries = []
+        self.deadlocks = []
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+def sale_batch(count):
+    return [
+        {'product_name': 'Curso', 'amount': '97.00', 'quantity': 1, 'sale_date': '2024-05-01',
+         'platform': 'Hotmart', 'external_id': f'HP{i}', 'status': 'approved'}
+        for i in range(count)
+    ]
+
+
+def make_operations():
+    operations = DBOperations()
+    operations.db = FakeDatabase()
+    return operations
+
+
+def test_prepare_sale_row_parses_iso_date_strings():
+    operations = make_operations()
+    row = {'product_name': 'Curso', 'amount': '97.00', 'sale_date': '2024-05-01', 'platform': 'Hotmart'}
+    assert operations._prepare_sale_row(row)[4] == date(2024, 5, 1)
+    row['sale_date'] = datetime(2024, 5, 1, 13, 30)
+    assert operations._prepare_sale_row(row)[4] == date(2024, 5, 1)
+
+
+def test_replaying_dict_batch_changes_nothing():
+    operations = make_operations()
+    batch = sale_batch(3)
+
+    first = operations.create_sales_bulk(1, batch)
+    assert (first['inserted'], first['failed']) == (3, 0)
+
+    replay = operations.create_sales_bulk(1, batch)
+    assert replay == {"inserted": 0, "updated": 0, "unchanged": 3, "failed": 0, "errors": []}
+
+
+def test_existing_keys_are_locked_and_deadlocks_retried():
+    operations = make_operations()
+    operations.db.deadlocks.append(True)
+
+    report = operations.create_sales_bulk(1, sale_batch(2))
+    assert (report['inserted'], report['failed']) == (2, 0)
+    lookups = [query for query in operations.db.queries if "FROM sales" in query and "external_id" in query]
+    assert len(lookups) == 2 and all("FOR UPDATE" in query for query in lookups)